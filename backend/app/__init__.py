@@ -1,28 +1,63 @@
 from __future__ import annotations
 
 import time
-from flask import Flask, jsonify
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 
-from app.config import settings
 from app.routes import api
-from app.db import init_db, purge_expired_cache
+from app.db import init_db
 from app.utils.errors import HttpError
+from app.services.coingecko import rate_limit_stats
+from app.services.stream import coin_stream
+from app.utils.cache import tiered_cache
+from app.utils.http import http_stats
+from app.utils.maintenance import start_cache_purger
+from app.utils.response_cache import response_cache
+from app.utils.singleflight import single_flight
+from app.utils.telemetry import HTTP_REQUEST_DURATION, HTTP_REQUESTS, registry
 
 
 def create_app() -> Flask:
     app = Flask(__name__)
-    CORS(app, resources={r"*": {"origins": "*"}})
+    CORS(app, resources={r"*": {"origins": "*"}}, expose_headers=["X-Cache-Status"])
 
     init_db()
-    purge_expired_cache(settings.api_cache_max_age_seconds)
+    start_cache_purger()
 
     start_time = time.time()
 
+    @app.before_request
+    def start_request_timer() -> None:
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get("request_started")
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, route, request.method)
+            HTTP_REQUESTS.inc(route, request.method, str(response.status_code))
+        return response
+
+    @app.get("/metrics")
+    def metrics():
+        return Response(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
     @app.get("/healthz")
     def healthcheck():
         uptime = time.time() - start_time
-        return jsonify({"status": "ok", "uptime": uptime})
+        return jsonify(
+            {
+                "status": "ok",
+                "uptime": uptime,
+                "http": http_stats(),
+                "rateLimit": rate_limit_stats(),
+                "singleFlight": single_flight.stats(),
+                "cache": tiered_cache.stats(),
+                "responseCache": response_cache.stats(),
+                "stream": coin_stream.stats(),
+            }
+        )
 
     app.register_blueprint(api, url_prefix="/api")
 
@@ -0,0 +1,156 @@
+"""ASGI entry point: ``uvicorn app.asgi:app``.
+
+Requests still go through the Flask views, which run on a bounded thread
+pool (``ASGI_WSGI_THREADS``). Before a view runs, whatever upstream data it
+would have to fetch on a cache miss is fetched here on the event loop with
+an async client, so requests waiting on CoinGecko hold no thread and the
+view finds everything cached. ``/api/stream/coins`` is served on the loop
+directly, so open streams hold no thread either.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import queue
+from typing import Any, Awaitable, Callable, Dict, List
+from urllib.parse import parse_qsl
+
+from a2wsgi import WSGIMiddleware
+
+from app import app as flask_app
+from app.config import settings
+from app.services.metrics import warm_coins, warm_market_overview
+from app.services.stream import coin_stream, format_event
+from app.utils.async_http import close_async_client
+from app.utils.codec import dumps
+from app.utils.errors import HttpError
+from app.utils.response_cache import request_key, response_cache
+
+logger = logging.getLogger(__name__)
+
+wsgi = WSGIMiddleware(flask_app, workers=settings.asgi_wsgi_threads)
+
+Query = Dict[str, str]
+# Flask-CORS adds this on the WSGI path; streams served here bypass it.
+CORS_HEADERS = [(b"access-control-allow-origin", b"*")]
+
+
+def _ids(query: Query) -> List[str] | None:
+    return query["ids"].split(",") if query.get("ids") else None
+
+
+_WARMERS: Dict[str, Callable[[Query], Awaitable[None]]] = {
+    "/api/coins": lambda query: warm_coins(
+        _ids(query),
+        query.get("vs_currency"),
+        query.get("include_details", "true").lower() != "false",
+    ),
+    "/api/market/overview": lambda query: warm_market_overview(),
+}
+
+
+async def _send_json(send: Callable, status: int, payload: Any) -> None:
+    body = dumps(payload)
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+            + CORS_HEADERS,
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _wait_for_disconnect(receive: Callable) -> None:
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _stream_coins(query: Query, receive: Callable, send: Callable) -> None:
+    try:
+        subscription, snapshot = coin_stream.subscribe(_ids(query), query.get("vs_currency"))
+    except HttpError as exc:
+        await _send_json(send, exc.status_code, {"message": str(exc)})
+        return
+
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+    subscription.notify = lambda: loop.call_soon_threadsafe(wake.set)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+
+    async def _write(chunk: bytes) -> None:
+        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+    try:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream; charset=utf-8"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ]
+                + CORS_HEADERS,
+            }
+        )
+        await _write(f"retry: {settings.stream_poll_interval_seconds * 1000}\n\n".encode("utf-8"))
+        await _write(format_event("snapshot", {"vsCurrency": subscription.vs_currency, "coins": snapshot}))
+        while not subscription.closed and not disconnected.done():
+            wake.clear()
+            while True:
+                try:
+                    await _write(format_event(*subscription.queue.get_nowait()))
+                except queue.Empty:
+                    break
+            woken = asyncio.ensure_future(wake.wait())
+            done, _ = await asyncio.wait(
+                {woken, disconnected},
+                timeout=settings.stream_heartbeat_seconds,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            woken.cancel()
+            if not done:
+                await _write(b": keep-alive\n\n")
+        if not disconnected.done():
+            # The hub dropped this stream; end the response so the client reconnects.
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+    except OSError:
+        pass  # the client went away mid-write
+    finally:
+        disconnected.cancel()
+        coin_stream.unsubscribe(subscription)
+
+
+async def _lifespan(receive: Callable, send: Callable) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await close_async_client()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+
+    if scope["type"] == "http" and scope["method"] == "GET":
+        args = parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)
+        query = dict(args)
+        if scope["path"] == "/api/stream/coins":
+            await _stream_coins(query, receive, send)
+            return
+        warm = _WARMERS.get(scope["path"])
+        # A fresh encoded body means the view will not touch the data caches at all.
+        if warm is not None and request_key(scope["path"], args) not in response_cache:
+            try:
+                await warm(query)
+            except Exception:  # the view still serves the request its own way
+                logger.exception("Warming %s failed", scope["path"])
+
+    await wsgi(scope, receive, send)
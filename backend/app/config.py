@@ -2,12 +2,33 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
+DEFAULT_API_CACHE_MAX_AGE_SECONDS = 7 * 24 * 3600
+# How long browsers and CDNs may keep showing a stale response, as a multiple
+# of the endpoint's soft TTL; the server's own hard TTL is a separate, much
+# longer fallback for when the upstream is down.
+DEFAULT_CLIENT_SWR_SOFT_TTL_MULTIPLE = 5
+
+
+def _ttl_pair(prefix: str, soft_default: int) -> Tuple[int, int]:
+    """(soft, hard) TTL for one endpoint: fresh until soft, served stale until hard."""
+    hard_default = os.getenv("API_CACHE_MAX_AGE_SECONDS", str(DEFAULT_API_CACHE_MAX_AGE_SECONDS))
+    return (
+        int(os.getenv(f"{prefix}_SOFT_TTL_SECONDS", str(soft_default))),
+        int(os.getenv(f"{prefix}_HARD_TTL_SECONDS", hard_default)),
+    )
+
+
+def _client_swr(prefix: str, soft_default: int) -> int:
+    """``stale-while-revalidate`` advertised to clients for one endpoint."""
+    soft = int(os.getenv(f"{prefix}_SOFT_TTL_SECONDS", str(soft_default)))
+    return int(os.getenv(f"{prefix}_CLIENT_SWR_SECONDS", str(soft * DEFAULT_CLIENT_SWR_SOFT_TTL_MULTIPLE)))
+
 
 @dataclass
 class Settings:
@@ -20,16 +41,64 @@ class Settings:
     )
     default_vs_currency: str = os.getenv("DEFAULT_VS_CURRENCY", "usd")
     cache_ttl_seconds: int = int(os.getenv("CACHE_TTL_SECONDS", "60"))
-    api_cache_max_age_seconds: int = int(os.getenv("API_CACHE_MAX_AGE_SECONDS", str(7 * 24 * 3600)))
+    cache_max_bytes: int = int(os.getenv("CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    response_cache_max_bytes: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+    response_compress_min_bytes: int = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+    response_gzip_level: int = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+    response_brotli_quality: int = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+    api_cache_max_age_seconds: int = int(
+        os.getenv("API_CACHE_MAX_AGE_SECONDS", str(DEFAULT_API_CACHE_MAX_AGE_SECONDS))
+    )
+    api_cache_purge_interval_seconds: int = int(os.getenv("API_CACHE_PURGE_INTERVAL_SECONDS", "300"))
+    api_cache_purge_batch_size: int = int(os.getenv("API_CACHE_PURGE_BATCH_SIZE", "500"))
+    api_cache_compress_min_bytes: int = int(os.getenv("API_CACHE_COMPRESS_MIN_BYTES", "1024"))
+    api_cache_compress_level: int = int(os.getenv("API_CACHE_COMPRESS_LEVEL", "6"))
+    cache_ttls: Dict[str, Tuple[int, int]] = field(
+        default_factory=lambda: {
+            "coins": _ttl_pair("COINS", 60),
+            "details": _ttl_pair("COIN_DETAILS", 600),
+            "history": _ttl_pair("HISTORY", 300),
+            "overview": _ttl_pair("OVERVIEW", 120),
+        }
+    )
+    client_swr_seconds: Dict[str, int] = field(
+        default_factory=lambda: {
+            "coins": _client_swr("COINS", 60),
+            "history": _client_swr("HISTORY", 300),
+            "overview": _client_swr("OVERVIEW", 120),
+        }
+    )
+    health_snapshot_interval_seconds: int = int(os.getenv("HEALTH_SNAPSHOT_INTERVAL_SECONDS", "300"))
+    health_snapshot_retention_days: int = int(os.getenv("HEALTH_SNAPSHOT_RETENTION_DAYS", "90"))
+    stream_poll_interval_seconds: int = int(os.getenv("STREAM_POLL_INTERVAL_SECONDS", "15"))
+    stream_heartbeat_seconds: int = int(os.getenv("STREAM_HEARTBEAT_SECONDS", "20"))
+    refresh_workers: int = int(os.getenv("REFRESH_WORKERS", "2"))
     max_coins_per_request: int = int(os.getenv("MAX_COINS_PER_REQUEST", "12"))
+    top_coins_default_limit: int = int(os.getenv("TOP_COINS_DEFAULT_LIMIT", "100"))
+    market_batch_window_ms: int = int(os.getenv("MARKET_BATCH_WINDOW_MS", "25"))
+    detail_fetch_workers: int = int(os.getenv("DETAIL_FETCH_WORKERS", "4"))
+    detail_fetch_deadline_seconds: float = float(os.getenv("DETAIL_FETCH_DEADLINE_SECONDS", "8"))
     request_timeout_seconds: int = int(os.getenv("REQUEST_TIMEOUT_SECONDS", "12"))
+    http_pool_connections: int = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))
+    http_pool_maxsize: int = int(os.getenv("HTTP_POOL_MAXSIZE", "8"))
+    http_pool_block: bool = os.getenv("HTTP_POOL_BLOCK", "true").lower() == "true"
+    asgi_wsgi_threads: int = int(os.getenv("ASGI_WSGI_THREADS", "16"))
+    async_http_max_connections: int = int(os.getenv("ASYNC_HTTP_MAX_CONNECTIONS", "64"))
     coingecko_base_url: str = os.getenv(
         "COINGECKO_BASE_URL", "https://api.coingecko.com/api/v3"
     )
+    coingecko_rate_limit_per_minute: float = float(os.getenv("COINGECKO_RATE_LIMIT_PER_MINUTE", "25"))
+    coingecko_rate_limit_burst: int = int(os.getenv("COINGECKO_RATE_LIMIT_BURST", "5"))
+    rate_limit_wait: bool = os.getenv("RATE_LIMIT_WAIT", "true").lower() == "true"
+    rate_limit_max_wait_seconds: float = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "5"))
+    rate_limit_default_retry_after: float = float(os.getenv("RATE_LIMIT_DEFAULT_RETRY_AFTER", "30"))
     database_path: str = os.getenv(
         "DATABASE_PATH",
         os.path.join(os.path.dirname(__file__), "..", "data", "app.sqlite3"),
     )
+    sqlite_busy_timeout_ms: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    sqlite_mmap_size: int = int(os.getenv("SQLITE_MMAP_SIZE", str(64 * 1024 * 1024)))
+    sqlite_cached_statements: int = int(os.getenv("SQLITE_CACHED_STATEMENTS", "128"))
     smtp_host: str | None = os.getenv("SMTP_HOST")
     smtp_port: int = int(os.getenv("SMTP_PORT", "587"))
     smtp_username: str | None = os.getenv("SMTP_USERNAME")
@@ -1,20 +1,68 @@
 from __future__ import annotations
 
+import functools
+import os
 import sqlite3
-import json
-from datetime import datetime, timedelta, timezone
+import threading
+import time
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Tuple, TypeVar
 
 from app.config import settings
+from app.utils.codec import PayloadDecodeError, decode_payload, encode_payload
+from app.utils.telemetry import CACHE_LOOKUPS, SQLITE_QUERY_DURATION, cache_prefix
 
 _DB_PATH = Path(settings.database_path).resolve()
 _DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
 
+_local = threading.local()
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _timed(func: F) -> F:
+    """Record how long each call spends in ``func``, labelled with its name."""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            SQLITE_QUERY_DURATION.observe(time.perf_counter() - started, name)
+
+    return wrapper  # type: ignore[return-value]
+
+
 def _get_connection() -> sqlite3.Connection:
-    conn = sqlite3.connect(_DB_PATH)
+    """Return this thread's long-lived connection, opening it on first use.
+
+    Connections are kept per thread (sqlite3 objects must not cross
+    threads) and per process, so a forked gunicorn worker never reuses its
+    parent's handle. Keeping them open lets sqlite3 reuse its prepared
+    statement cache across requests.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.pid == os.getpid():
+        return conn
+
+    conn = sqlite3.connect(
+        _DB_PATH,
+        timeout=settings.sqlite_busy_timeout_ms / 1000,
+        cached_statements=settings.sqlite_cached_statements,
+    )
     conn.row_factory = sqlite3.Row
+    # WAL lets readers proceed while gunicorn workers or the prefetch script write.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    conn.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    _local.conn = conn
+    _local.pid = os.getpid()
     return conn
 
 
@@ -46,10 +94,79 @@ def init_db() -> None:
             CREATE TABLE IF NOT EXISTS api_cache (
                 cache_key TEXT PRIMARY KEY,
                 data TEXT NOT NULL,
-                fetched_at TEXT NOT NULL
+                fetched_at TEXT NOT NULL,
+                format TEXT NOT NULL DEFAULT 'json',
+                fetched_at_epoch INTEGER,
+                expires_at INTEGER
+            )
+            """
+        )
+        _migrate_api_cache(conn)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_api_cache_expires_at ON api_cache (expires_at)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS price_points (
+                coin TEXT NOT NULL,
+                vs_currency TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                price REAL NOT NULL,
+                market_cap REAL NOT NULL DEFAULT 0,
+                volume REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (coin, vs_currency, ts)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS price_coverage (
+                coin TEXT NOT NULL,
+                vs_currency TEXT NOT NULL,
+                resolution TEXT NOT NULL,
+                start_ts INTEGER NOT NULL,
+                PRIMARY KEY (coin, vs_currency, resolution)
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS health_snapshots (
+                coin TEXT NOT NULL,
+                vs_currency TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                health_score REAL NOT NULL,
+                volatility_score REAL NOT NULL,
+                liquidity_score REAL NOT NULL,
+                momentum_score REAL NOT NULL,
+                development_score REAL NOT NULL,
+                price REAL,
+                PRIMARY KEY (coin, vs_currency, ts)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_health_snapshots_ts_score ON health_snapshots (ts, health_score)"
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                blocked_until REAL NOT NULL DEFAULT 0
             )
             """
         )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shared_histograms (
+                name TEXT NOT NULL,
+                labels TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                value REAL NOT NULL,
+                PRIMARY KEY (name, labels, bucket)
+            ) WITHOUT ROWID
+            """
+        )
         defaults = {
             "EMAIL_ENABLED": "false",
             "SMTP_HOST": settings.smtp_host or "",
@@ -67,9 +184,29 @@ def init_db() -> None:
             """,
             [(key, value, now) for key, value in defaults.items()],
         )
-    conn.close()
 
 
+def _migrate_api_cache(conn: sqlite3.Connection) -> None:
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(api_cache)")}
+    if "format" not in columns:
+        # Rows written before payload formats existed are plain JSON text.
+        conn.execute("ALTER TABLE api_cache ADD COLUMN format TEXT NOT NULL DEFAULT 'json'")
+    if "fetched_at_epoch" not in columns:
+        conn.execute("ALTER TABLE api_cache ADD COLUMN fetched_at_epoch INTEGER")
+        conn.execute("ALTER TABLE api_cache ADD COLUMN expires_at INTEGER")
+        # One-off backfill from the ISO strings, which mix "+00:00" and "Z" suffixes.
+        rows = conn.execute("SELECT cache_key, fetched_at FROM api_cache").fetchall()
+        updates = []
+        for row in rows:
+            fetched_epoch = int(_parse_timestamp(row["fetched_at"]).timestamp())
+            updates.append((fetched_epoch, fetched_epoch + settings.api_cache_max_age_seconds, row["cache_key"]))
+        conn.executemany(
+            "UPDATE api_cache SET fetched_at_epoch = ?, expires_at = ? WHERE cache_key = ?",
+            updates,
+        )
+
+
+@_timed
 def upsert_user(email: str, coins: List[str]) -> None:
     normalized_email = email.strip().lower()
     coins = sorted(set([coin.strip().lower() for coin in coins if coin.strip()]))
@@ -88,14 +225,13 @@ def upsert_user(email: str, coins: List[str]) -> None:
             """,
             (normalized_email, coins_str, now, now),
         )
-    conn.close()
 
 
+@_timed
 def list_users() -> List[Dict[str, object]]:
     conn = _get_connection()
     with conn:
         rows = conn.execute("SELECT email, coins, created_at, updated_at FROM users").fetchall()
-    conn.close()
     results: List[Dict[str, object]] = []
     for row in rows:
         data = dict(row)
@@ -104,6 +240,7 @@ def list_users() -> List[Dict[str, object]]:
     return results
 
 
+@_timed
 def get_user(email: str) -> Dict[str, object] | None:
     conn = _get_connection()
     with conn:
@@ -111,7 +248,6 @@ def get_user(email: str) -> Dict[str, object] | None:
             "SELECT email, coins, created_at, updated_at FROM users WHERE email = ?",
             (email.strip().lower(),),
         ).fetchone()
-    conn.close()
     if not row:
         return None
     data = dict(row)
@@ -119,6 +255,7 @@ def get_user(email: str) -> Dict[str, object] | None:
     return data
 
 
+@_timed
 def upsert_config(entries: Dict[str, str]) -> None:
     if not entries:
         return
@@ -133,9 +270,9 @@ def upsert_config(entries: Dict[str, str]) -> None:
             """,
             [(key, value, now) for key, value in entries.items()],
         )
-    conn.close()
 
 
+@_timed
 def get_config(keys: List[str] | None = None) -> Dict[str, str]:
     conn = _get_connection()
     with conn:
@@ -147,69 +284,515 @@ def get_config(keys: List[str] | None = None) -> Dict[str, str]:
             ).fetchall()
         else:
             rows = conn.execute("SELECT key, value FROM settings").fetchall()
-    conn.close()
     return {row["key"]: row["value"] for row in rows}
 
 
-def get_cached_json(cache_key: str, max_age_seconds: int, allow_expired: bool = False) -> Any | None:
+def _parse_timestamp(value: str) -> datetime:
+    if value.endswith("Z"):
+        value = value.replace("Z", "+00:00")
+    return datetime.fromisoformat(value)
+
+
+@_timed
+def get_cached_entries(cache_keys: List[str]) -> Dict[str, Tuple[Any, float]]:
+    """Return ``{cache_key: (value, age_seconds)}`` for every cached key, expired or not.
+
+    Callers decide how old is too old; nothing is deleted here so expired
+    rows remain available as stale fallbacks.
+    """
+    if not cache_keys:
+        return {}
+    placeholder = ",".join(["?"] * len(cache_keys))
     conn = _get_connection()
     with conn:
-        row = conn.execute(
-            "SELECT data, fetched_at FROM api_cache WHERE cache_key = ?",
-            (cache_key,),
-        ).fetchone()
-    conn.close()
-    if not row:
-        return None
+        rows = conn.execute(
+            f"SELECT cache_key, data, fetched_at_epoch, format FROM api_cache WHERE cache_key IN ({placeholder})",
+            list(cache_keys),
+        ).fetchall()
 
-    fetched_raw = row["fetched_at"]
-    if fetched_raw.endswith("Z"):
-        fetched_raw = fetched_raw.replace("Z", "+00:00")
-    fetched_at = datetime.fromisoformat(fetched_raw)
-    if datetime.now(timezone.utc) - fetched_at > timedelta(seconds=max_age_seconds):
-        if allow_expired:
-            try:
-                return json.loads(row["data"])
-            except json.JSONDecodeError:
-                return None
-        delete_cached(cache_key)
-        return None
+    now = time.time()
+    results: Dict[str, Tuple[Any, float]] = {}
+    for row in rows:
+        try:
+            value = decode_payload(row["data"], row["format"])
+        except PayloadDecodeError:
+            continue
+        results[row["cache_key"]] = (value, now - row["fetched_at_epoch"])
+    for cache_key in cache_keys:
+        CACHE_LOOKUPS.inc("sqlite", cache_prefix(cache_key), "hit" if cache_key in results else "miss")
+    return results
 
-    try:
-        return json.loads(row["data"])
-    except json.JSONDecodeError:
-        return None
+
+@_timed
+def set_cached_json_many(entries: Dict[str, Any], ttl: int | None = None) -> None:
+    """Store payloads; rows become eligible for purging ``ttl`` seconds from now."""
+    if not entries:
+        return
+    now = datetime.now(timezone.utc)
+    fetched_epoch = int(now.timestamp())
+    expires_at = fetched_epoch + (settings.api_cache_max_age_seconds if ttl is None else ttl)
+    rows = []
+    for key, value in entries.items():
+        data, fmt = encode_payload(value)
+        rows.append((key, data, now.isoformat(), fmt, fetched_epoch, expires_at))
+    conn = _get_connection()
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO api_cache (cache_key, data, fetched_at, format, fetched_at_epoch, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(cache_key) DO UPDATE SET
+                data=excluded.data,
+                fetched_at=excluded.fetched_at,
+                format=excluded.format,
+                fetched_at_epoch=excluded.fetched_at_epoch,
+                expires_at=excluded.expires_at
+            """,
+            rows,
+        )
 
 
-def set_cached_json(cache_key: str, value: Any) -> None:
-    payload = json.dumps(value)
-    now = datetime.now(timezone.utc).isoformat()
+def iter_cached_payloads(batch_size: int = 200):
+    """Yield ``(cache_key, data, format)`` for every api_cache row, in key order."""
+    conn = _get_connection()
+    last_key = ""
+    while True:
+        rows = conn.execute(
+            "SELECT cache_key, data, format FROM api_cache WHERE cache_key > ? ORDER BY cache_key LIMIT ?",
+            (last_key, batch_size),
+        ).fetchall()
+        if not rows:
+            return
+        for row in rows:
+            yield row["cache_key"], row["data"], row["format"]
+        last_key = rows[-1]["cache_key"]
+
+
+@_timed
+def rewrite_cached_payloads(rows: List[Tuple[str, Any, str]]) -> None:
+    """Replace stored payloads in place, keeping each row's ``fetched_at``."""
+    conn = _get_connection()
+    with conn:
+        conn.executemany(
+            "UPDATE api_cache SET data = ?, format = ? WHERE cache_key = ?",
+            [(data, fmt, key) for key, data, fmt in rows],
+        )
+
+
+@_timed
+def database_size_bytes() -> int:
+    conn = _get_connection()
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return page_count * page_size
+
+
+@_timed
+def vacuum() -> None:
+    conn = _get_connection()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("VACUUM")
+
+
+@_timed
+def purge_expired_cache(batch_size: int = 500) -> int:
+    """Delete up to ``batch_size`` rows past their ``expires_at``; return how many went.
+
+    Batches keep each write transaction short, so callers loop until this
+    returns less than ``batch_size``.
+    """
+    conn = _get_connection()
+    with conn:
+        cursor = conn.execute(
+            """
+            DELETE FROM api_cache WHERE rowid IN (
+                SELECT rowid FROM api_cache WHERE expires_at < ? LIMIT ?
+            )
+            """,
+            (int(time.time()), batch_size),
+        )
+    return cursor.rowcount
+
+
+# Bucket widths in milliseconds, finest first. Coverage at one resolution
+# implies coverage at every coarser one.
+PRICE_RESOLUTIONS = {"hourly": 3_600_000, "daily": 86_400_000}
+
+PricePoint = Tuple[int, float, float, float]  # (ts in ms, price, market cap, volume)
+
+
+def get_price_coverage(coin: str, vs_currency: str, resolution: str) -> Tuple[int | None, int | None]:
+    """Return ``(start_ts, last_ts)``: how far back ``resolution`` data reaches and the newest point."""
+    return get_price_coverages([coin], vs_currency, resolution)[coin]
+
+
+@_timed
+def get_price_coverages(
+    coins: List[str], vs_currency: str, resolution: str
+) -> Dict[str, Tuple[int | None, int | None]]:
+    """``get_price_coverage`` for many coins in one query."""
+    if not coins:
+        return {}
+    values = ", ".join("(?)" for _ in coins)
+    conn = _get_connection()
+    rows = conn.execute(
+        f"""
+        WITH wanted(coin) AS (VALUES {values})
+        SELECT
+            wanted.coin AS coin,
+            (
+                SELECT start_ts FROM price_coverage
+                WHERE coin = wanted.coin AND vs_currency = ? AND resolution = ?
+            ) AS start_ts,
+            (
+                SELECT MAX(ts) FROM price_points
+                WHERE coin = wanted.coin AND vs_currency = ?
+            ) AS last_ts
+        FROM wanted
+        """,
+        (*coins, vs_currency, resolution, vs_currency),
+    ).fetchall()
+    return {row["coin"]: (row["start_ts"], row["last_ts"]) for row in rows}
+
+
+@_timed
+def store_price_points(
+    coin: str,
+    vs_currency: str,
+    points: List[PricePoint],
+    resolution: str | None = None,
+    start_ts: int | None = None,
+) -> None:
+    """Upsert ``points``; with ``resolution``/``start_ts`` also record a completed backfill."""
+    conn = _get_connection()
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO price_points (coin, vs_currency, ts, price, market_cap, volume)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(coin, vs_currency, ts) DO UPDATE SET
+                price=excluded.price,
+                market_cap=excluded.market_cap,
+                volume=excluded.volume
+            """,
+            [(coin, vs_currency, *point) for point in points],
+        )
+        if resolution is None or start_ts is None:
+            return
+        names = list(PRICE_RESOLUTIONS)
+        conn.executemany(
+            """
+            INSERT INTO price_coverage (coin, vs_currency, resolution, start_ts)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(coin, vs_currency, resolution) DO UPDATE SET
+                start_ts=MIN(price_coverage.start_ts, excluded.start_ts)
+            """,
+            [(coin, vs_currency, name, start_ts) for name in names[names.index(resolution):]],
+        )
+
+
+@_timed
+def reset_price_coverage(coin: str, vs_currency: str, resolution: str) -> None:
+    """Forget ``resolution`` coverage, e.g. after a gap too long to fill at that resolution."""
     conn = _get_connection()
     with conn:
         conn.execute(
+            "DELETE FROM price_coverage WHERE coin = ? AND vs_currency = ? AND resolution = ?",
+            (coin, vs_currency, resolution),
+        )
+
+
+def get_price_points(coin: str, vs_currency: str, start_ts: int, resolution: str) -> List[PricePoint]:
+    """Return the last point of every ``resolution`` bucket from ``start_ts`` onwards."""
+    return get_price_points_many([coin], vs_currency, start_ts, resolution).get(coin, [])
+
+
+@_timed
+def get_price_points_many(
+    coins: List[str], vs_currency: str, start_ts: int, resolution: str
+) -> Dict[str, List[PricePoint]]:
+    """``get_price_points`` for many coins in one query; coins without points are left out."""
+    if not coins:
+        return {}
+    placeholder = ",".join("?" for _ in coins)
+    conn = _get_connection()
+    # SQLite fills the bare columns from the row that supplied MAX(ts).
+    rows = conn.execute(
+        f"""
+        SELECT coin, MAX(ts) AS ts, price, market_cap, volume
+        FROM price_points
+        WHERE vs_currency = ? AND coin IN ({placeholder}) AND ts >= ?
+        GROUP BY coin, ts / ?
+        ORDER BY coin, ts
+        """,
+        (vs_currency, *coins, start_ts, PRICE_RESOLUTIONS[resolution]),
+    ).fetchall()
+    points: Dict[str, List[PricePoint]] = {}
+    for row in rows:
+        points.setdefault(row["coin"], []).append((row["ts"], row["price"], row["market_cap"], row["volume"]))
+    return points
+
+
+# Score columns of health_snapshots, in API field order.
+HEALTH_SNAPSHOT_FIELDS = {
+    "healthScore": "health_score",
+    "volatilityScore": "volatility_score",
+    "liquidityScore": "liquidity_score",
+    "momentumScore": "momentum_score",
+    "developmentScore": "development_score",
+}
+
+
+def _snapshot_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    snapshot = {field: row[column] for field, column in HEALTH_SNAPSHOT_FIELDS.items()}
+    snapshot["price"] = row["price"]
+    return snapshot
+
+
+@_timed
+def store_health_snapshots(ts: int, vs_currency: str, snapshots: List[Tuple[str, Dict[str, float], float | None]]) -> None:
+    """Persist one scoring run; ``snapshots`` holds ``(coin, metrics, price)`` per coin."""
+    conn = _get_connection()
+    with conn:
+        conn.executemany(
             """
-            INSERT INTO api_cache (cache_key, data, fetched_at)
-            VALUES (?, ?, ?)
-            ON CONFLICT(cache_key) DO UPDATE SET data=excluded.data, fetched_at=excluded.fetched_at
+            INSERT INTO health_snapshots (
+                coin, vs_currency, ts, health_score, volatility_score,
+                liquidity_score, momentum_score, development_score, price
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(coin, vs_currency, ts) DO UPDATE SET
+                health_score=excluded.health_score,
+                volatility_score=excluded.volatility_score,
+                liquidity_score=excluded.liquidity_score,
+                momentum_score=excluded.momentum_score,
+                development_score=excluded.development_score,
+                price=excluded.price
+            """,
+            [
+                (coin, vs_currency, ts, *(metrics[field] for field in HEALTH_SNAPSHOT_FIELDS), price)
+                for coin, metrics, price in snapshots
+            ],
+        )
+
+
+@_timed
+def get_health_ranking(vs_currency: str, limit: int, window_ms: int) -> Tuple[int | None, List[Dict[str, Any]]]:
+    """Return the newest snapshot time and the ``limit`` healthiest coins.
+
+    Each scoring run only covers the coins one request asked for, so every
+    coin is ranked by its own newest snapshot taken within ``window_ms`` of
+    the latest one.
+    """
+    conn = _get_connection()
+    latest = conn.execute(
+        "SELECT MAX(ts) AS ts FROM health_snapshots WHERE vs_currency = ?",
+        (vs_currency,),
+    ).fetchone()
+    if latest is None or latest["ts"] is None:
+        return None, []
+    rows = conn.execute(
+        """
+        SELECT s.coin, s.ts, s.health_score, s.volatility_score, s.liquidity_score, s.momentum_score,
+               s.development_score, s.price
+        FROM health_snapshots AS s
+        JOIN (
+            SELECT coin, MAX(ts) AS ts
+            FROM health_snapshots
+            WHERE vs_currency = ? AND ts >= ?
+            GROUP BY coin
+        ) AS newest ON newest.coin = s.coin AND newest.ts = s.ts
+        WHERE s.vs_currency = ?
+        ORDER BY s.health_score DESC
+        LIMIT ?
+        """,
+        (vs_currency, latest["ts"] - window_ms, vs_currency, limit),
+    ).fetchall()
+    return latest["ts"], [{"coin": row["coin"], "timestamp": row["ts"], **_snapshot_dict(row)} for row in rows]
+
+
+@_timed
+def get_health_trend(coin: str, vs_currency: str, since_ts: int) -> List[Dict[str, Any]]:
+    conn = _get_connection()
+    rows = conn.execute(
+        """
+        SELECT ts, health_score, volatility_score, liquidity_score, momentum_score, development_score, price
+        FROM health_snapshots
+        WHERE coin = ? AND vs_currency = ? AND ts >= ?
+        ORDER BY ts
+        """,
+        (coin, vs_currency, since_ts),
+    ).fetchall()
+    return [{"timestamp": row["ts"], **_snapshot_dict(row)} for row in rows]
+
+
+@_timed
+def purge_health_snapshots(before_ts: int, batch_size: int = 500) -> int:
+    """Delete up to ``batch_size`` snapshots older than ``before_ts``; return how many went."""
+    conn = _get_connection()
+    with conn:
+        cursor = conn.execute(
+            """
+            DELETE FROM health_snapshots WHERE (coin, vs_currency, ts) IN (
+                SELECT coin, vs_currency, ts FROM health_snapshots WHERE ts < ? LIMIT ?
+            )
             """,
-            (cache_key, payload, now),
+            (before_ts, batch_size),
         )
-    conn.close()
+    return cursor.rowcount
 
 
-def delete_cached(cache_key: str) -> None:
+@_timed
+def thin_price_points(before_ts: int, resolution: str, batch_size: int = 500) -> int:
+    """Delete up to ``batch_size`` points older than ``before_ts`` that a later point in the same
+    ``resolution`` bucket supersedes (reads only use the last one); return how many went."""
+    bucket_ms = PRICE_RESOLUTIONS[resolution]
     conn = _get_connection()
     with conn:
-        conn.execute("DELETE FROM api_cache WHERE cache_key = ?", (cache_key,))
-    conn.close()
+        cursor = conn.execute(
+            """
+            DELETE FROM price_points WHERE (coin, vs_currency, ts) IN (
+                SELECT p.coin, p.vs_currency, p.ts FROM price_points AS p
+                WHERE p.ts < ? AND EXISTS (
+                    SELECT 1 FROM price_points AS later
+                    WHERE later.coin = p.coin AND later.vs_currency = p.vs_currency
+                        AND later.ts > p.ts AND later.ts < (p.ts / ? + 1) * ?
+                )
+                LIMIT ?
+            )
+            """,
+            (before_ts, bucket_ms, bucket_ms, batch_size),
+        )
+    return cursor.rowcount
 
 
-def purge_expired_cache(max_age_seconds: int) -> None:
-    threshold = datetime.now(timezone.utc) - timedelta(seconds=max_age_seconds)
+@_timed
+def purge_price_points(before_ts: int, batch_size: int = 500) -> int:
+    """Delete up to ``batch_size`` points older than ``before_ts``; return how many went."""
     conn = _get_connection()
     with conn:
+        cursor = conn.execute(
+            """
+            DELETE FROM price_points WHERE (coin, vs_currency, ts) IN (
+                SELECT coin, vs_currency, ts FROM price_points WHERE ts < ? LIMIT ?
+            )
+            """,
+            (before_ts, batch_size),
+        )
+    return cursor.rowcount
+
+
+@_timed
+def trim_price_coverage(resolution: str, start_ts: int) -> None:
+    """Move recorded ``resolution`` coverage up to ``start_ts`` once older data has been thinned or dropped."""
+    conn = _get_connection()
+    with conn:
+        conn.execute(
+            "UPDATE price_coverage SET start_ts = ? WHERE resolution = ? AND start_ts < ?",
+            (start_ts, resolution, start_ts),
+        )
+
+
+@_timed
+def consume_rate_limit_token(name: str, rate_per_second: float, capacity: float) -> float:
+    """Take one token from the shared bucket ``name``.
+
+    Returns 0 when a token was taken, otherwise the number of seconds until
+    one becomes available. The read-modify-write runs under ``BEGIN
+    IMMEDIATE`` so every process sharing the database sees a single bucket.
+    """
+    conn = _get_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT tokens, updated_at, blocked_until FROM rate_limits WHERE name = ?",
+            (name,),
+        ).fetchone()
+        now = time.time()
+        if row:
+            elapsed = max(now - row["updated_at"], 0.0)
+            tokens = min(capacity, row["tokens"] + elapsed * rate_per_second)
+            blocked_until = row["blocked_until"]
+        else:
+            tokens = capacity
+            blocked_until = 0.0
+
+        if blocked_until > now:
+            wait_seconds = blocked_until - now
+        elif tokens >= 1:
+            tokens -= 1
+            wait_seconds = 0.0
+        else:
+            wait_seconds = (1 - tokens) / rate_per_second
+
         conn.execute(
-            "DELETE FROM api_cache WHERE fetched_at < ?",
-            (threshold.isoformat(),),
+            """
+            INSERT INTO rate_limits (name, tokens, updated_at, blocked_until)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET tokens=excluded.tokens, updated_at=excluded.updated_at
+            """,
+            (name, tokens, now, blocked_until),
         )
-    conn.close()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return wait_seconds
+
+
+@_timed
+def block_rate_limit(name: str, until: float) -> None:
+    """Stop handing out tokens for ``name`` until the epoch time ``until``."""
+    conn = _get_connection()
+    with conn:
+        conn.execute(
+            """
+            INSERT INTO rate_limits (name, tokens, updated_at, blocked_until)
+            VALUES (?, 0, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                tokens=0,
+                updated_at=excluded.updated_at,
+                blocked_until=MAX(rate_limits.blocked_until, excluded.blocked_until)
+            """,
+            (name, time.time(), until),
+        )
+
+
+# Label values are joined with the ASCII unit separator; bucket -1 holds the sum.
+_LABEL_SEPARATOR = "\x1f"
+_SUM_BUCKET = -1
+
+
+@_timed
+def add_shared_histogram_observation(name: str, labels: Tuple[str, ...], bucket: int, value: float) -> None:
+    """Count ``value`` into ``bucket`` of a histogram shared by every process using this database."""
+    key = _LABEL_SEPARATOR.join(labels)
+    conn = _get_connection()
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO shared_histograms (name, labels, bucket, value)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(name, labels, bucket) DO UPDATE SET value = value + excluded.value
+            """,
+            [(name, key, bucket, 1), (name, key, _SUM_BUCKET, value)],
+        )
+
+
+@_timed
+def get_shared_histogram(name: str, bucket_count: int) -> Dict[Tuple[str, ...], List[float]]:
+    """Return ``{labels: [count per bucket..., sum]}`` for a shared histogram."""
+    conn = _get_connection()
+    rows = conn.execute(
+        "SELECT labels, bucket, value FROM shared_histograms WHERE name = ?",
+        (name,),
+    ).fetchall()
+    series: Dict[Tuple[str, ...], List[float]] = {}
+    for row in rows:
+        labels = tuple(row["labels"].split(_LABEL_SEPARATOR)) if row["labels"] else ()
+        values = series.setdefault(labels, [0] * bucket_count + [0.0])
+        if row["bucket"] == _SUM_BUCKET:
+            values[-1] = row["value"]
+        elif row["bucket"] < bucket_count:
+            values[row["bucket"]] = int(row["value"])
+    return series
@@ -1,16 +1,24 @@
 from __future__ import annotations
 
 import re
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 
 from app.services.metrics import (
     get_coin_history,
+    get_coins_history,
     get_coins_with_metrics,
     get_market_overview,
+    get_top_coins_with_metrics,
+    history_columns,
 )
-from app.services.policy_news import get_policy_news
-from app.services.macro import get_nfp_series
+from app.services.analytics import get_coin_analytics
+from app.services.policy_news import CACHE_TTL_SECONDS as POLICY_NEWS_TTL_SECONDS, get_policy_news
+from app.services.snapshots import get_health_history, get_health_rankings
+from app.services.stream import coin_stream, format_event
+from app.services.macro import NFP_TTL_SECONDS, get_nfp_series
+from app.utils.cache import pop_cache_status
 from app.utils.errors import HttpError
+from app.utils.response_cache import cached_json_response
 from app.db import upsert_user, get_user, list_users, upsert_config, get_config
 from app.config import settings
 from send_notifications import run_once as run_email_digest
@@ -26,6 +34,20 @@ api = Blueprint("api", __name__)
 EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 
 
+@api.before_request
+def reset_cache_status() -> None:
+    # Worker threads are reused across requests; start each one with a clean slate.
+    pop_cache_status()
+
+
+@api.after_request
+def add_cache_status(response):
+    status = pop_cache_status()
+    if status:
+        response.headers["X-Cache-Status"] = status
+    return response
+
+
 @api.route("/coins", methods=["GET"])
 def coins() -> tuple:
     ids_param = request.args.get("ids")
@@ -34,43 +56,181 @@ def coins() -> tuple:
     include_details = request.args.get("include_details", "true").lower() != "false"
 
     try:
-        data = get_coins_with_metrics(ids=ids, vs_currency=vs_currency, include_details=include_details)
+        return cached_json_response(
+            lambda: get_coins_with_metrics(ids=ids, vs_currency=vs_currency, include_details=include_details),
+            settings.cache_ttls["coins"],
+            settings.client_swr_seconds["coins"],
+        )
+    except HttpError as exc:
+        return jsonify({"message": str(exc)}), exc.status_code
+
+
+@api.route("/stream/coins", methods=["GET"])
+def stream_coins():
+    ids_param = request.args.get("ids")
+    ids = ids_param.split(",") if ids_param else None
+    try:
+        subscription, snapshot = coin_stream.subscribe(ids, request.args.get("vs_currency"))
+    except HttpError as exc:
+        return jsonify({"message": str(exc)}), exc.status_code
+
+    def _events():
+        try:
+            yield f"retry: {settings.stream_poll_interval_seconds * 1000}\n\n".encode("utf-8")
+            yield format_event("snapshot", {"vsCurrency": subscription.vs_currency, "coins": snapshot})
+            for event in subscription.events(settings.stream_heartbeat_seconds):
+                # Comment lines keep proxies from closing an idle connection.
+                yield format_event(*event) if event is not None else b": keep-alive\n\n"
+        finally:
+            coin_stream.unsubscribe(subscription)
+
+    response = Response(_events(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _history_shape_args() -> tuple[str, int | None]:
+    layout = request.args.get("format", "rows")
+    points_param = request.args.get("points")
+    if layout not in ("rows", "columns"):
+        raise HttpError(400, "format must be 'rows' or 'columns'")
+    try:
+        points = int(points_param) if points_param else None
+    except ValueError:
+        points = 0
+    if points is not None and points < 3:
+        raise HttpError(400, "points must be an integer of at least 3")
+    return layout, points
+
+
+@api.route("/coins/history", methods=["GET"])
+def coins_history() -> tuple:
+    ids_param = request.args.get("ids")
+    ids = ids_param.split(",") if ids_param else None
+    timeframe = request.args.get("timeframe", "30D")
+    vs_currency = request.args.get("vs_currency")
+
+    try:
+        layout, points = _history_shape_args()
+    except HttpError as exc:
+        return jsonify({"message": str(exc)}), exc.status_code
+
+    def _build():
+        histories = get_coins_history(ids, timeframe, vs_currency=vs_currency, points=points)
+        if layout == "columns":
+            return {coin_id: history_columns(history) for coin_id, history in histories.items()}
+        return histories
+
+    try:
+        return cached_json_response(_build, settings.cache_ttls["history"], settings.client_swr_seconds["history"])
     except HttpError as exc:
         return jsonify({"message": str(exc)}), exc.status_code
-    return jsonify(data)
 
 
 @api.route("/coins/<string:coin_id>/history", methods=["GET"])
 def coin_history(coin_id: str) -> tuple:
     timeframe = request.args.get("timeframe", "30D")
     vs_currency = request.args.get("vs_currency")
+    try:
+        layout, points = _history_shape_args()
+    except HttpError as exc:
+        return jsonify({"message": str(exc)}), exc.status_code
+
+    def _build():
+        history = get_coin_history(coin_id, timeframe, vs_currency=vs_currency, points=points)
+        return history_columns(history) if layout == "columns" else history
+
+    try:
+        return cached_json_response(_build, settings.cache_ttls["history"], settings.client_swr_seconds["history"])
+    except HttpError as exc:
+        return jsonify({"message": str(exc)}), exc.status_code
+
+
+@api.route("/analytics", methods=["GET"])
+def coin_analytics() -> tuple:
+    ids_param = request.args.get("ids")
+    ids = ids_param.split(",") if ids_param else None
+    timeframe = request.args.get("timeframe", "30D")
+    vs_currency = request.args.get("vs_currency")
+    window_param = request.args.get("window")
+    try:
+        window = int(window_param) if window_param else None
+    except ValueError:
+        return jsonify({"message": "window must be an integer"}), 400
 
     try:
-        history = get_coin_history(coin_id, timeframe, vs_currency=vs_currency)
+        return cached_json_response(
+            lambda: get_coin_analytics(ids=ids, timeframe_key=timeframe, vs_currency=vs_currency, window=window),
+            settings.cache_ttls["history"],
+            settings.client_swr_seconds["history"],
+        )
+    except HttpError as exc:
+        return jsonify({"message": str(exc)}), exc.status_code
+
+
+@api.route("/rankings/health", methods=["GET"])
+def health_rankings() -> tuple:
+    try:
+        limit = int(request.args.get("limit", "20"))
+    except ValueError:
+        return jsonify({"message": "limit must be an integer"}), 400
+    try:
+        return jsonify(get_health_rankings(request.args.get("vs_currency"), limit=limit))
+    except HttpError as exc:
+        return jsonify({"message": str(exc)}), exc.status_code
+
+
+@api.route("/coins/<string:coin_id>/health-trend", methods=["GET"])
+def health_trend(coin_id: str) -> tuple:
+    try:
+        days = int(request.args.get("days", "30"))
+    except ValueError:
+        return jsonify({"message": "days must be an integer"}), 400
+    try:
+        return jsonify(get_health_history(coin_id, request.args.get("vs_currency"), days=days))
     except HttpError as exc:
         return jsonify({"message": str(exc)}), exc.status_code
-    return jsonify(history)
 
 
 @api.route("/market/overview", methods=["GET"])
 def market_overview() -> tuple:
     vs_currency = request.args.get("vs_currency")
     try:
-        overview = get_market_overview(vs_currency)
+        return cached_json_response(
+            lambda: get_market_overview(vs_currency),
+            settings.cache_ttls["overview"],
+            settings.client_swr_seconds["overview"],
+        )
+    except HttpError as exc:
+        return jsonify({"message": str(exc)}), exc.status_code
+
+
+@api.route("/market/top", methods=["GET"])
+def top_coins() -> tuple:
+    try:
+        limit = int(request.args.get("limit", settings.top_coins_default_limit))
+    except ValueError:
+        return jsonify({"message": "limit must be an integer"}), 400
+    vs_currency = request.args.get("vs_currency")
+    try:
+        return cached_json_response(
+            lambda: get_top_coins_with_metrics(vs_currency, limit=limit),
+            settings.cache_ttls["coins"],
+            settings.client_swr_seconds["coins"],
+        )
     except HttpError as exc:
         return jsonify({"message": str(exc)}), exc.status_code
-    return jsonify(overview)
 
 
 @api.route("/news/policies", methods=["GET"])
 def policy_news() -> tuple:
-    news = get_policy_news()
-    return jsonify(news)
+    return cached_json_response(get_policy_news, (POLICY_NEWS_TTL_SECONDS, POLICY_NEWS_TTL_SECONDS))
 
 
 @api.route("/macro/nfp", methods=["GET"])
 def macro_nfp() -> tuple:
-    return jsonify(get_nfp_series())
+    return cached_json_response(get_nfp_series, (NFP_TTL_SECONDS, NFP_TTL_SECONDS))
 
 
 def _normalize_coins(coins) -> list[str]:
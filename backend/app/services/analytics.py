@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from app.config import settings
+from app.db import PRICE_RESOLUTIONS, get_price_coverages, get_price_points_many
+from app.services.metrics import history_sync_error, sync_coin_histories
+from app.utils.cache import cache
+from app.utils.errors import HttpError
+
+BENCHMARK_COIN = "bitcoin"
+# Returns per rolling-volatility window when the caller does not pick one.
+DEFAULT_WINDOWS = {"hourly": 6, "daily": 7}
+PERIODS_PER_YEAR = {"hourly": 24 * 365, "daily": 365}
+
+
+def get_coin_analytics(
+    ids: Sequence[str] | None = None,
+    timeframe_key: str = "30D",
+    vs_currency: str | None = None,
+    window: int | None = None,
+) -> Dict[str, Any]:
+    """Rolling volatility, max drawdown, beta vs bitcoin and return correlations for ``ids``.
+
+    Works on the same stored ``price_points`` series as the history
+    endpoint, synced the same concurrent, deadline-bounded way, and aligned
+    on the buckets every coin has a point for. Results are memoized against
+    the newest stored timestamp of each series, so repeat queries cost one
+    coverage query until new points arrive.
+    """
+    ids = list(dict.fromkeys(coin.strip().lower() for coin in (ids or settings.default_coins) if coin.strip()))
+    vs_currency = (vs_currency or settings.default_vs_currency).lower()
+    if len(ids) < 2:
+        raise HttpError(400, "At least two coin ids are required")
+    if len(ids) > settings.max_coins_per_request:
+        raise HttpError(
+            400,
+            f"A maximum of {settings.max_coins_per_request} coins can be requested at once",
+        )
+    if window is not None and window < 2:
+        raise HttpError(400, "window must be at least 2")
+
+    series_ids = ids if BENCHMARK_COIN in ids else [*ids, BENCHMARK_COIN]
+    start_ts, resolution, failures = sync_coin_histories(series_ids, timeframe_key, vs_currency)
+    window = window or DEFAULT_WINDOWS[resolution]
+
+    coverage = get_price_coverages(series_ids, vs_currency, resolution)
+    if any(coverage[coin_id][1] is None for coin_id in failures):
+        # Every series is needed, and this one has nothing stored to fall back on.
+        raise history_sync_error(failures)
+    fingerprint = tuple(coverage[coin_id][1] for coin_id in series_ids)
+    cache_key = f"analytics:{vs_currency}:{timeframe_key}:{window}:{','.join(ids)}"
+    cached = cache.get(cache_key)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    result = _compute(ids, series_ids, vs_currency, start_ts, resolution, window)
+    result["timeframe"] = timeframe_key
+    result["vsCurrency"] = vs_currency
+    cache.set(cache_key, (fingerprint, result), settings.cache_ttls["history"][0])
+    return result
+
+
+def _aligned_prices(series_ids: List[str], vs_currency: str, start_ts: int, resolution: str):
+    """Return bucket timestamps and a ``(buckets, coins)`` price matrix over buckets all coins share."""
+    bucket_ms = PRICE_RESOLUTIONS[resolution]
+    stored = get_price_points_many(series_ids, vs_currency, start_ts, resolution)
+    by_coin: List[Dict[int, tuple]] = [
+        {ts // bucket_ms: (ts, price) for ts, price, _cap, _volume in stored.get(coin_id, []) if price > 0}
+        for coin_id in series_ids
+    ]
+    shared = sorted(set.intersection(*(set(points) for points in by_coin)))
+    timestamps = [by_coin[0][bucket][0] for bucket in shared]
+    prices = np.array([[points[bucket][1] for points in by_coin] for bucket in shared], dtype=float)
+    return timestamps, prices.reshape(len(shared), len(series_ids))
+
+
+def _rolling_std(returns: np.ndarray, window: int) -> np.ndarray:
+    # Sample standard deviation over each trailing window, from cumulative sums.
+    zeros = np.zeros((1, returns.shape[1]))
+    sums = np.vstack([zeros, np.cumsum(returns, axis=0)])
+    squares = np.vstack([zeros, np.cumsum(returns**2, axis=0)])
+    window_sum = sums[window:] - sums[:-window]
+    window_squares = squares[window:] - squares[:-window]
+    variance = (window_squares - window_sum**2 / window) / (window - 1)
+    return np.sqrt(np.clip(variance, 0.0, None))
+
+
+def _finite_value(value: float) -> float | None:
+    # JSON has no NaN/inf: a flat or too-short series reports null instead.
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def _finite(values: np.ndarray) -> List[float | None]:
+    return [_finite_value(value) for value in values.tolist()]
+
+
+def _compute(
+    ids: List[str],
+    series_ids: List[str],
+    vs_currency: str,
+    start_ts: int,
+    resolution: str,
+    window: int,
+) -> Dict[str, Any]:
+    timestamps, prices = _aligned_prices(series_ids, vs_currency, start_ts, resolution)
+    count = len(ids)
+    empty = {
+        "coins": ids,
+        "resolution": resolution,
+        "window": window,
+        "points": len(timestamps),
+        "metrics": {coin_id: {"volatility": None, "maxDrawdown": None, "beta": None} for coin_id in ids},
+        "rollingVolatility": {"timestamp": [], **{coin_id: [] for coin_id in ids}},
+        "correlation": {"coins": ids, "matrix": [[None] * count for _ in range(count)]},
+    }
+    if len(timestamps) < 3:
+        return empty
+
+    annualize = math.sqrt(PERIODS_PER_YEAR[resolution])
+    returns = np.diff(np.log(prices), axis=0)
+    drawdowns = (prices / np.maximum.accumulate(prices, axis=0) - 1).min(axis=0)
+    volatility = returns.std(axis=0, ddof=1) * annualize
+
+    benchmark = returns[:, series_ids.index(BENCHMARK_COIN)]
+    benchmark_variance = benchmark.var(ddof=1)
+    centered = returns - returns.mean(axis=0)
+    covariance = centered.T @ (benchmark - benchmark.mean()) / (len(benchmark) - 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        beta = covariance / benchmark_variance
+        correlation = np.corrcoef(returns[:, :count], rowvar=False)
+
+    rolling: Dict[str, Any] = {"timestamp": []}
+    if len(returns) >= window:
+        rolling_volatility = _rolling_std(returns[:, :count], window) * annualize
+        rolling["timestamp"] = timestamps[window:]
+        for index, coin_id in enumerate(ids):
+            rolling[coin_id] = _finite(rolling_volatility[:, index])
+    else:
+        rolling.update({coin_id: [] for coin_id in ids})
+
+    return {
+        **empty,
+        "metrics": {
+            coin_id: {
+                "volatility": _finite_value(volatility[index]),
+                "maxDrawdown": _finite_value(drawdowns[index]),
+                "beta": _finite_value(beta[index]),
+            }
+            for index, coin_id in enumerate(ids)
+        },
+        "rollingVolatility": rolling,
+        "correlation": {"coins": ids, "matrix": [_finite(row) for row in np.atleast_2d(correlation)]},
+    }
@@ -1,102 +1,326 @@
 from __future__ import annotations
 
+import asyncio
+import re
+import threading
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Set, Tuple
 
 import requests
 
 from app.config import settings
-from app.utils.cache import cache_wrap
+from app.utils.async_http import async_http_get
 from app.utils.errors import HttpError
+from app.utils.http import http_get
+from app.utils.ratelimit import TokenBucket, parse_retry_after
+from app.utils.telemetry import UPSTREAM_REQUEST_DURATION, UPSTREAM_REQUESTS
+
+# Largest page /coins/markets serves; more ids are split across requests.
+MARKETS_PAGE_SIZE = 250
+
+_limiter = TokenBucket(
+    "coingecko",
+    rate_per_minute=settings.coingecko_rate_limit_per_minute,
+    burst=settings.coingecko_rate_limit_burst,
+)
+
+
+# "/coins/bitcoin/market_chart" -> "/coins/{id}/market_chart", keeping metric labels bounded.
+_COIN_PATH = re.compile(r"^/coins/(?!markets$)[^/]+")
+
+
+def _endpoint_label(endpoint: str) -> str:
+    return _COIN_PATH.sub("/coins/{id}", endpoint)
+
+
+def _record_attempt(endpoint: str, started: float, status: str) -> None:
+    label = _endpoint_label(endpoint)
+    UPSTREAM_REQUEST_DURATION.observe(time.perf_counter() - started, "coingecko", label)
+    UPSTREAM_REQUESTS.inc("coingecko", label, status)
+
+
+def _timed_get(endpoint: str, url: str, **kwargs: Any) -> requests.Response:
+    started = time.perf_counter()
+    status = "error"
+    try:
+        response = http_get(url, **kwargs)
+        status = str(response.status_code)
+        return response
+    finally:
+        _record_attempt(endpoint, started, status)
+
+
+async def _timed_get_async(endpoint: str, url: str, **kwargs: Any) -> Any:
+    started = time.perf_counter()
+    status = "error"
+    try:
+        response = await async_http_get(url, **kwargs)
+        status = str(response.status_code)
+        return response
+    finally:
+        _record_attempt(endpoint, started, status)
+
+
+# Backoff after network errors; 429 pacing is left to the shared limiter.
+NETWORK_BACKOFF_SECONDS = (1, 3)
+MAX_ATTEMPTS = len(NETWORK_BACKOFF_SECONDS) + 1
+JSON_HEADERS = {"Accept": "application/json"}
+
+
+# The retry policy below is shared by the blocking client (_request) and the
+# event-loop client (_request_async); each of them only performs the I/O.
+def _retry_delay(attempt: int, status: int | None) -> float | None:
+    # None gives up; a None status is a network error or timeout.
+    if attempt >= MAX_ATTEMPTS:
+        return None
+    if status is None:
+        return NETWORK_BACKOFF_SECONDS[attempt - 1]
+    if status == 429:
+        return 0  # retry as soon as the limiter hands out a token again
+    return None
+
+
+def _rate_limit_pause(headers: Any) -> float:
+    retry_after = parse_retry_after(headers.get("Retry-After"))
+    return retry_after if retry_after is not None else settings.rate_limit_default_retry_after
+
+
+def _status_error(status: int, reason: str) -> HttpError:
+    return HttpError(status, f"CoinGecko API error ({status}): {reason}")
+
+
+def _network_error(exc: Exception) -> HttpError:
+    return HttpError(502, f"CoinGecko request failed: {exc}")
 
 
 def _request(endpoint: str, params: Dict[str, Any] | None = None) -> Any:
     url = f"{settings.coingecko_base_url}{endpoint}"
-    backoff_seconds = [0, 1, 3]
-
-    for attempt, delay in enumerate(backoff_seconds, start=1):
+    delay: float | None = 0
+    for attempt in range(1, MAX_ATTEMPTS + 1):
         if delay:
             time.sleep(delay)
+        _limiter.acquire()
         try:
-            response = requests.get(
-                url,
-                params=params,
-                timeout=settings.request_timeout_seconds,
-                headers={"Accept": "application/json"},
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.HTTPError as exc:
-            status = exc.response.status_code if exc.response is not None else 500
-            if status == 429 and attempt < len(backoff_seconds):
-                # Hit API rate limit, retry after backoff
-                continue
-            message = exc.response.reason if exc.response is not None else str(exc)
-            raise HttpError(status, f"CoinGecko API error ({status}): {message}") from exc
+            response = _timed_get(endpoint, url, params=params, headers=JSON_HEADERS)
+            if response.status_code < 400:
+                return response.json()
         except requests.RequestException as exc:  # network or timeout
-            if attempt < len(backoff_seconds):
-                continue
-            raise HttpError(502, f"CoinGecko request failed: {exc}") from exc
+            delay = _retry_delay(attempt, None)
+            if delay is None:
+                raise _network_error(exc) from exc
+            continue
+        if response.status_code == 429:
+            _limiter.block_for(_rate_limit_pause(response.headers))
+        delay = _retry_delay(attempt, response.status_code)
+        if delay is None:
+            raise _status_error(response.status_code, response.reason)
 
 
-def fetch_market_data(ids: List[str], vs_currency: str, include_sparkline: bool = True) -> Any:
-    cache_key = (
-        f"markets:{vs_currency}:{','.join(sorted(ids))}:sparkline:{include_sparkline}"
-    )
+async def _request_async(endpoint: str, params: Dict[str, Any] | None = None) -> Any:
+    # Same limiter and retry policy as _request, without a thread.
+    import httpx
+
+    url = f"{settings.coingecko_base_url}{endpoint}"
+    delay: float | None = 0
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        if delay:
+            await asyncio.sleep(delay)
+        await _limiter.acquire_async()
+        try:
+            response = await _timed_get_async(endpoint, url, params=params, headers=JSON_HEADERS)
+            if response.status_code < 400:
+                return response.json()
+        except httpx.HTTPError as exc:  # network or timeout
+            delay = _retry_delay(attempt, None)
+            if delay is None:
+                raise _network_error(exc) from exc
+            continue
+        if response.status_code == 429:
+            await asyncio.to_thread(_limiter.block_for, _rate_limit_pause(response.headers))
+        delay = _retry_delay(attempt, response.status_code)
+        if delay is None:
+            raise _status_error(response.status_code, response.reason_phrase)
+
+
+def rate_limit_stats() -> Dict[str, float]:
+    return _limiter.stats()
+
+
+class _MarketBatch:
+    def __init__(self) -> None:
+        self.ids: Set[str] = set()
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.error: BaseException | None = None
+        self.done = threading.Event()
+
+    def add_rows(self, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            self.rows[row["id"]] = row
 
-    def _factory() -> Any:
-        return _request(
-            "/coins/markets",
-            params={
-                "vs_currency": vs_currency,
-                "ids": ",".join(ids),
-                "sparkline": str(include_sparkline).lower(),
-                "price_change_percentage": "1h,24h,7d,30d,1y",
-                "precision": 6,
-            },
-        )
+    def result(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        if self.error is not None:
+            raise self.error
+        return {coin_id: self.rows[coin_id] for coin_id in ids if coin_id in self.rows}
 
-    return cache_wrap(cache_key, _factory)
 
+# Ids missed within `window` of each other share one /coins/markets call.
+class _MarketRowBatcher:
+    batch_class = _MarketBatch
 
-def fetch_market_chart(coin_id: str, vs_currency: str, days: int) -> Any:
-    cache_key = f"market-chart:{coin_id}:{vs_currency}:{days}"
+    def __init__(self, window: float) -> None:
+        self.window = window
+        self._lock = threading.Lock()
+        self._open: Dict[Tuple[str, bool], _MarketBatch] = {}
 
-    def _factory() -> Any:
-        return _request(
-            f"/coins/{coin_id}/market_chart",
-            params={
-                "vs_currency": vs_currency,
-                "days": days,
-                "interval": "hourly" if days <= 1 else "daily",
-            },
-        )
+    def _join(self, batch_key: Tuple[str, bool], ids: List[str]) -> Tuple[_MarketBatch, bool]:
+        # The caller that opens a batch leads it.
+        with self._lock:
+            batch = self._open.get(batch_key)
+            leader = batch is None
+            if leader:
+                batch = self._open[batch_key] = self.batch_class()
+            batch.ids.update(ids)
+        return batch, leader
 
-    return cache_wrap(cache_key, _factory)
+    def _close(self, batch_key: Tuple[str, bool]) -> None:
+        with self._lock:
+            del self._open[batch_key]
+
+    def fetch(self, ids: List[str], vs_currency: str, include_sparkline: bool) -> Dict[str, Dict[str, Any]]:
+        batch_key = (vs_currency, include_sparkline)
+        batch, leader = self._join(batch_key, ids)
+        if leader:
+            if self.window > 0:
+                time.sleep(self.window)
+            self._close(batch_key)
+            try:
+                for params in _market_pages(sorted(batch.ids), vs_currency, include_sparkline):
+                    batch.add_rows(_request("/coins/markets", params=params))
+            except BaseException as exc:
+                batch.error = exc
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+        return batch.result(ids)
+
+
+_market_batcher = _MarketRowBatcher(window=settings.market_batch_window_ms / 1000)
+
+
+def _market_pages(ids: List[str], vs_currency: str, include_sparkline: bool) -> List[Dict[str, Any]]:
+    return [
+        _market_params(ids[start : start + MARKETS_PAGE_SIZE], vs_currency, include_sparkline)
+        for start in range(0, len(ids), MARKETS_PAGE_SIZE)
+    ]
+
+
+def _market_params(ids: List[str] | None, vs_currency: str, include_sparkline: bool) -> Dict[str, Any]:
+    # Without ids upstream pages through every coin by market cap.
+    params: Dict[str, Any] = {
+        "vs_currency": vs_currency,
+        "per_page": MARKETS_PAGE_SIZE,
+        "sparkline": str(include_sparkline).lower(),
+        "price_change_percentage": "1h,24h,7d,30d,1y",
+        "precision": 6,
+    }
+    if ids is not None:
+        params["ids"] = ",".join(ids)
+    return params
+
+
+def fetch_market_data(ids: List[str], vs_currency: str, include_sparkline: bool = True) -> List[Dict[str, Any]]:
+    rows = _market_batcher.fetch(list(dict.fromkeys(ids)), vs_currency, include_sparkline)
+    return sorted(rows.values(), key=lambda row: row.get("market_cap") or 0, reverse=True)
+
+
+def fetch_top_market_data(vs_currency: str, limit: int, include_sparkline: bool = True) -> List[Dict[str, Any]]:
+    params = {**_market_params(None, vs_currency, include_sparkline), "order": "market_cap_desc", "per_page": limit}
+    return _request("/coins/markets", params=params)
+
+
+def fetch_market_chart(coin_id: str, vs_currency: str, days: int, interval: str | None = None) -> Any:
+    params: Dict[str, Any] = {"vs_currency": vs_currency, "days": days}
+    if interval:
+        params["interval"] = interval
+    return _request(f"/coins/{coin_id}/market_chart", params=params)
+
+
+def fetch_market_chart_range(coin_id: str, vs_currency: str, from_ts: float, to_ts: float) -> Any:
+    # Upstream granularity: 5-minutely up to a day, hourly up to 90 days, then daily.
+    return _request(
+        f"/coins/{coin_id}/market_chart/range",
+        params={"vs_currency": vs_currency, "from": int(from_ts), "to": int(to_ts)},
+    )
 
 
 def fetch_global_data() -> Any:
-    return cache_wrap("global", lambda: _request("/global"))
+    return _request("/global")
 
 
 def fetch_trending() -> Any:
-    return cache_wrap("trending", lambda: _request("/search/trending"))
+    return _request("/search/trending")
+
+
+COIN_DETAIL_PARAMS = {
+    "localization": "false",
+    "tickers": "false",
+    "market_data": "true",
+    "community_data": "true",
+    "developer_data": "true",
+    "sparkline": "false",
+}
 
 
 def fetch_coin_details(coin_id: str) -> Any:
-    cache_key = f"coin-details:{coin_id}"
-
-    def _factory() -> Any:
-        return _request(
-            f"/coins/{coin_id}",
-            params={
-                "localization": "false",
-                "tickers": "false",
-                "market_data": "true",
-                "community_data": "true",
-                "developer_data": "true",
-                "sparkline": "false",
-            },
-        )
-
-    return cache_wrap(cache_key, _factory, ttl=600)
+    return _request(f"/coins/{coin_id}", params=COIN_DETAIL_PARAMS)
+
+
+class _AsyncMarketBatch(_MarketBatch):
+    def __init__(self) -> None:
+        super().__init__()
+        self.done = asyncio.Event()
+
+
+class _AsyncMarketRowBatcher(_MarketRowBatcher):
+    batch_class = _AsyncMarketBatch
+
+    async def fetch(self, ids: List[str], vs_currency: str, include_sparkline: bool) -> Dict[str, Dict[str, Any]]:
+        batch_key = (vs_currency, include_sparkline)
+        batch, leader = self._join(batch_key, ids)
+        if leader:
+            if self.window > 0:
+                await asyncio.sleep(self.window)
+            self._close(batch_key)
+            try:
+                for params in _market_pages(sorted(batch.ids), vs_currency, include_sparkline):
+                    batch.add_rows(await _request_async("/coins/markets", params=params))
+            except BaseException as exc:
+                batch.error = exc
+            finally:
+                batch.done.set()
+        else:
+            await batch.done.wait()
+        return batch.result(ids)
+
+
+_async_market_batcher = _AsyncMarketRowBatcher(window=settings.market_batch_window_ms / 1000)
+
+
+async def fetch_market_data_async(
+    ids: List[str], vs_currency: str, include_sparkline: bool = True
+) -> List[Dict[str, Any]]:
+    rows = await _async_market_batcher.fetch(list(dict.fromkeys(ids)), vs_currency, include_sparkline)
+    return sorted(rows.values(), key=lambda row: row.get("market_cap") or 0, reverse=True)
+
+
+async def fetch_global_data_async() -> Any:
+    return await _request_async("/global")
+
+
+async def fetch_trending_async() -> Any:
+    return await _request_async("/search/trending")
+
+
+async def fetch_coin_details_async(coin_id: str) -> Any:
+    return await _request_async(f"/coins/{coin_id}", params=COIN_DETAIL_PARAMS)
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, List
+
+from app.config import settings
+
+# Longest span upstream still answers with hourly points; beyond it only daily.
+HOURLY_RANGE_LIMIT_DAYS = 90
+
+
+@dataclass(frozen=True)
+class RangeFetch:
+    """One upstream ``market_chart`` backfill that several timeframes are sliced from."""
+
+    resolution: str  # "hourly" or "daily", the finest bucket the fetch can answer
+    days: int
+    interval: str | None  # None lets upstream pick hourly points for 2-90 days
+
+    @property
+    def sync_key(self) -> str:
+        return f"{self.resolution}:{self.days}"
+
+
+HOURLY_FETCH = RangeFetch("hourly", HOURLY_RANGE_LIMIT_DAYS, None)
+
+
+def daily_fetch() -> RangeFetch:
+    return RangeFetch("daily", max(max(settings.supported_timeframes.values()), HOURLY_RANGE_LIMIT_DAYS), "daily")
+
+
+def plan_for_days(days: int) -> RangeFetch:
+    """Pick the single backfill whose data can answer a ``days``-long timeframe."""
+    return HOURLY_FETCH if days <= HOURLY_RANGE_LIMIT_DAYS else daily_fetch()
+
+
+def plan_history_fetches(timeframe_keys: Iterable[str]) -> List[RangeFetch]:
+    """Return the minimum set of backfills covering ``timeframe_keys``: at most one hourly and one daily."""
+    fetches = {plan_for_days(settings.supported_timeframes[key]) for key in timeframe_keys}
+    return sorted(fetches, key=lambda fetch: fetch.days)
@@ -5,6 +5,8 @@ from typing import Dict, List
 
 from app.utils.cache import cache_wrap
 
+NFP_TTL_SECONDS = 3600
+
 # 简化示例数据：真实场景可接入官方 API
 MOCK_NFP_DATA: List[Dict[str, str | float]] = [
     {
@@ -49,4 +51,4 @@ def _with_timestamp(data: List[Dict[str, str | float]]) -> Dict[str, object]:
 
 def get_nfp_series() -> Dict[str, object]:
     # 这里直接返回缓存的模拟数据，后续可接入真实数据源
-    return cache_wrap("nfp_series", lambda: _with_timestamp(MOCK_NFP_DATA), ttl=3600)
+    return cache_wrap("nfp_series", lambda: _with_timestamp(MOCK_NFP_DATA), ttl=NFP_TTL_SECONDS)
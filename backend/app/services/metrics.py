@@ -1,17 +1,124 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Set, Tuple, TypeVar
 
 from app.config import settings
+from app.db import (
+    PricePoint,
+    get_price_coverage,
+    get_price_coverages,
+    get_price_points,
+    get_price_points_many,
+    reset_price_coverage,
+    store_price_points,
+)
 from app.services.coingecko import (
+    MARKETS_PAGE_SIZE,
     fetch_coin_details,
+    fetch_coin_details_async,
     fetch_global_data,
+    fetch_global_data_async,
     fetch_market_chart,
+    fetch_market_chart_range,
     fetch_market_data,
+    fetch_market_data_async,
+    fetch_top_market_data,
     fetch_trending,
+    fetch_trending_async,
+)
+from app.services.history_plan import (
+    HOURLY_RANGE_LIMIT_DAYS,
+    RangeFetch,
+    plan_for_days,
+    plan_history_fetches,
 )
+from app.services.scoring import BATCH_MIN_COINS, compute_metrics_batch
+from app.services.snapshots import record_health_snapshots
+from app.utils.cache import cache, record_cache_status, tiered_cache
+from app.utils.downsample import lttb
 from app.utils.errors import HttpError
-from app.db import get_cached_json, set_cached_json
+from app.utils.ratelimit import rate_limit_policy
+from app.utils.singleflight import async_single_flight, single_flight
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+DAY_MS = 86_400_000
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+_refreshing: Set[str] = set()
+_refreshing_lock = threading.Lock()
+
+
+def _get_executor(name: str, max_workers: int) -> ThreadPoolExecutor:
+    # Created lazily so that no worker threads exist before gunicorn forks.
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=max(max_workers, 1), thread_name_prefix=name)
+            _executors[name] = executor
+        return executor
+
+
+def _load_once(cache_key: str, max_age_seconds: float, loader: Callable[[], T]) -> T:
+    # Threads missing the same key share one in-flight load.
+
+    def _run() -> T:
+        entry = tiered_cache.get_entry(cache_key, max_age_seconds)
+        if entry is not None and entry[1] <= max_age_seconds:
+            return entry[0]
+        return loader()
+
+    return single_flight.do(cache_key, _run)
+
+
+def _schedule_refresh(cache_keys: List[str], refresh: Callable[[List[str]], Any]) -> None:
+    with _refreshing_lock:
+        claimed = [key for key in cache_keys if key not in _refreshing]
+        _refreshing.update(claimed)
+    if not claimed:
+        return
+
+    def _run() -> None:
+        try:
+            # Nobody is waiting on a background refresh, so queue for a token.
+            with rate_limit_policy(wait=True):
+                refresh(claimed)
+        except HttpError:
+            pass  # keep serving the stale copy; the next stale read schedules another attempt
+        finally:
+            with _refreshing_lock:
+                _refreshing.difference_update(claimed)
+
+    _get_executor("cache-refresh", settings.refresh_workers).submit(_run)
+
+
+def _read_through(cache_key: str, endpoint: str, loader: Callable[[], T]) -> Tuple[T, str, float]:
+    # Stale-while-revalidate; `loader` must store what it returns under cache_key.
+    soft_ttl, hard_ttl = settings.cache_ttls[endpoint]
+    entry = tiered_cache.get_entry(cache_key, soft_ttl)
+    if entry is not None:
+        value, age = entry
+        if age <= soft_ttl:
+            return value, "fresh", age
+        if age <= hard_ttl:
+            _schedule_refresh([cache_key], lambda _keys: _load_once(cache_key, soft_ttl, loader))
+            return value, "stale", age
+
+    try:
+        return _load_once(cache_key, soft_ttl, loader), "fresh", 0.0
+    except HttpError:
+        if entry is None:
+            raise
+        return entry[0], "stale", entry[1]
 
 
 def clamp(value: float, min_value: float, max_value: float) -> float:
@@ -121,6 +228,12 @@ def compute_metrics(coin: Dict[str, Any], details: Dict[str, Any] | None) -> Dic
     }
 
 
+def score_coins(coins: List[Dict[str, Any]], details: List[Dict[str, Any] | None]) -> List[Dict[str, float]]:
+    if len(coins) < BATCH_MIN_COINS:
+        return [compute_metrics(coin, detail) for coin, detail in zip(coins, details)]
+    return compute_metrics_batch(coins, details)
+
+
 def get_coins_with_metrics(
     ids: List[str] | None = None,
     vs_currency: str | None = None,
@@ -128,15 +241,6 @@ def get_coins_with_metrics(
 ) -> List[Dict[str, Any]]:
     ids = ids or settings.default_coins
     vs_currency = (vs_currency or settings.default_vs_currency).lower()
-    cache_key = "coins:{0}:{1}:{2}".format(
-        vs_currency,
-        ",".join(sorted(ids)),
-        int(include_details),
-    )
-
-    cached = get_cached_json(cache_key, settings.api_cache_max_age_seconds)
-    if cached:
-        return cached
 
     if not ids:
         raise HttpError(400, "At least one coin id is required")
@@ -146,70 +250,499 @@ def get_coins_with_metrics(
             f"A maximum of {settings.max_coins_per_request} coins can be requested at once",
         )
 
-    try:
-        market_data = fetch_market_data(ids, vs_currency)
-    except HttpError as exc:
-        cached = get_cached_json(cache_key, settings.api_cache_max_age_seconds, allow_expired=True)
-        if cached is not None:
-            return cached
-        raise exc
-    details_list: List[Dict[str, Any] | None] = []
+    market_data, degraded = _get_market_rows(ids, vs_currency)
     if include_details:
-        for coin in market_data:
-            detail_key = f"coin-detail:{coin['id']}"
-            detail = get_cached_json(detail_key, settings.api_cache_max_age_seconds)
-            if detail is None:
-                try:
-                    detail = fetch_coin_details(coin["id"])
-                    set_cached_json(detail_key, detail)
-                except HttpError as exc:
-                    stale = get_cached_json(detail_key, settings.api_cache_max_age_seconds, allow_expired=True)
-                    if stale is not None:
-                        detail = stale
-                    else:
-                        detail = None
-            details_list.append(detail)
+        details, degraded_details = _collect_coin_details([coin["id"] for coin in market_data])
+        degraded |= degraded_details
     else:
-        details_list = [None] * len(market_data)
+        details = {}
+
+    scores = score_coins(market_data, [details.get(coin["id"]) for coin in market_data])
+    if include_details:
+        # Scores without details fall back to neutral defaults; keep them out of the history.
+        record_health_snapshots(market_data, scores, vs_currency, skip=degraded)
+    return [
+        {
+            "coin": coin,
+            "metrics": metrics,
+            "degraded": coin["id"] in degraded,
+        }
+        for coin, metrics in zip(market_data, scores)
+    ]
 
-    result = [
+
+def get_top_coins_with_metrics(vs_currency: str | None = None, limit: int | None = None) -> List[Dict[str, Any]]:
+    # Details for a whole page would cost hundreds of rate-limited calls, so
+    # development and community scores keep their neutral defaults.
+    vs_currency = (vs_currency or settings.default_vs_currency).lower()
+    if limit is None:
+        limit = settings.top_coins_default_limit
+    if not 1 <= limit <= MARKETS_PAGE_SIZE:
+        raise HttpError(400, f"limit must be between 1 and {MARKETS_PAGE_SIZE}")
+
+    cache_key = f"market-top:{vs_currency}:{limit}"
+    market_data, status, age = _read_through(
+        cache_key, "coins", lambda: _load_top_market(cache_key, vs_currency, limit)
+    )
+    if status == "fresh":
+        record_cache_status("fresh", settings.cache_ttls["coins"][0] - age)
+    else:
+        record_cache_status("stale")
+    scores = score_coins(market_data, [None] * len(market_data))
+    return [{"coin": coin, "metrics": metrics} for coin, metrics in zip(market_data, scores)]
+
+
+def _load_top_market(cache_key: str, vs_currency: str, limit: int) -> List[Dict[str, Any]]:
+    rows = fetch_top_market_data(vs_currency, limit)
+    tiered_cache.set(cache_key, rows)
+    return rows
+
+
+def _market_row_key(coin_id: str, vs_currency: str) -> str:
+    return f"market:{vs_currency}:{coin_id}"
+
+
+def _coin_detail_key(coin_id: str) -> str:
+    return f"coin-detail:{coin_id}"
+
+
+def _get_market_rows(ids: List[str], vs_currency: str) -> Tuple[List[Dict[str, Any]], Set[str]]:
+    # Coins whose upstream fetch fails fall back to expired rows and are reported as degraded.
+    soft_ttl, hard_ttl = settings.cache_ttls["coins"]
+    keys = {coin_id: _market_row_key(coin_id, vs_currency) for coin_id in dict.fromkeys(ids)}
+    entries = tiered_cache.get_entries(list(keys.values()), soft_ttl)
+    rows: Dict[str, Dict[str, Any]] = {}
+    stale: List[str] = []
+    missing: List[str] = []
+    oldest_age = 0.0
+    for coin_id, key in keys.items():
+        entry = entries.get(key)
+        if entry is not None and entry[1] <= hard_ttl:
+            rows[coin_id] = entry[0]
+            oldest_age = max(oldest_age, entry[1])
+            if entry[1] > soft_ttl:
+                stale.append(key)
+        else:
+            missing.append(coin_id)
+
+    if stale:
+        record_cache_status("stale")
+        coin_by_key = {key: coin_id for coin_id, key in keys.items()}
+        _schedule_refresh(
+            stale,
+            lambda claimed: _refresh_market_rows([coin_by_key[key] for key in claimed], vs_currency),
+        )
+    elif rows:
+        record_cache_status("fresh", soft_ttl - oldest_age)
+
+    degraded: Set[str] = set()
+    if missing:
+        try:
+            rows.update(_refresh_market_rows(missing, vs_currency))
+            record_cache_status("fresh", soft_ttl)
+        except HttpError:
+            expired = {coin_id: entries[keys[coin_id]][0] for coin_id in missing if keys[coin_id] in entries}
+            if not rows and not expired:
+                raise
+            record_cache_status("stale")
+            rows.update(expired)
+            degraded.update(expired)
+
+    ordered = sorted(rows.values(), key=lambda row: row.get("market_cap") or 0, reverse=True)
+    return ordered, degraded
+
+
+def _refresh_market_rows(coin_ids: List[str], vs_currency: str) -> Dict[str, Dict[str, Any]]:
+    fetched = fetch_market_data(coin_ids, vs_currency)
+    tiered_cache.set_many({_market_row_key(row["id"], vs_currency): row for row in fetched})
+    return {row["id"]: row for row in fetched}
+
+
+def poll_coins_with_metrics(coin_ids: List[str], vs_currency: str, max_age: float) -> List[Dict[str, Any]]:
+    # Only already-cached details are used, so a poll never waits on the detail endpoint.
+    keys = {coin_id: _market_row_key(coin_id, vs_currency) for coin_id in dict.fromkeys(coin_ids)}
+    entries = tiered_cache.get_entries(list(keys.values()), max_age)
+    rows = {coin_id: entries[key][0] for coin_id, key in keys.items() if key in entries and entries[key][1] <= max_age}
+    due = [coin_id for coin_id in keys if coin_id not in rows]
+    if due:
+        rows.update(_refresh_market_rows(due, vs_currency))
+
+    market_data = [rows[coin_id] for coin_id in keys if coin_id in rows]
+    hard_ttl = settings.cache_ttls["details"][1]
+    detail_entries = tiered_cache.get_entries([_coin_detail_key(coin["id"]) for coin in market_data])
+    details = {}
+    for coin in market_data:
+        entry = detail_entries.get(_coin_detail_key(coin["id"]))
+        details[coin["id"]] = entry[0] if entry is not None and entry[1] <= hard_ttl else None
+
+    scores = score_coins(market_data, [details[coin["id"]] for coin in market_data])
+    return [
         {
             "coin": coin,
-            "metrics": compute_metrics(coin, details_list[idx]),
+            "metrics": metrics,
+            "degraded": details[coin["id"]] is None,
         }
-        for idx, coin in enumerate(market_data)
+        for coin, metrics in zip(market_data, scores)
     ]
-    set_cached_json(cache_key, result)
-    return result
 
 
-def get_coin_history(coin_id: str, timeframe_key: str, vs_currency: str | None = None) -> List[Dict[str, Any]]:
+def _collect_coin_details(coin_ids: List[str]) -> Tuple[Dict[str, Dict[str, Any] | None], Set[str]]:
+    # Fetches that miss the deadline keep running and fill the cache for later requests.
+    soft_ttl, hard_ttl = settings.cache_ttls["details"]
+    entries = tiered_cache.get_entries([_coin_detail_key(coin_id) for coin_id in coin_ids], soft_ttl)
+    details: Dict[str, Dict[str, Any] | None] = {}
+    stale: List[str] = []
+    pending: Dict[str, Future] = {}
+    executor = _get_executor("coin-detail", settings.detail_fetch_workers)
+    oldest_age = 0.0
+    for coin_id in coin_ids:
+        entry = entries.get(_coin_detail_key(coin_id))
+        if entry is not None and entry[1] <= hard_ttl:
+            details[coin_id] = entry[0]
+            oldest_age = max(oldest_age, entry[1])
+            if entry[1] > soft_ttl:
+                stale.append(coin_id)
+        elif coin_id not in pending:
+            # Carry the caller's rate-limit policy into the worker thread
+            context = contextvars.copy_context()
+            pending[coin_id] = executor.submit(context.run, _fetch_coin_detail, coin_id)
+
+    if stale:
+        record_cache_status("stale")
+        coin_by_key = {_coin_detail_key(coin_id): coin_id for coin_id in stale}
+        _schedule_refresh(
+            list(coin_by_key),
+            lambda claimed: _refresh_coin_details([coin_by_key[key] for key in claimed]),
+        )
+    elif details:
+        record_cache_status("fresh", soft_ttl - oldest_age)
+
+    degraded: Set[str] = set()
+    if pending:
+        done, _ = wait(pending.values(), timeout=settings.detail_fetch_deadline_seconds)
+        for coin_id, future in pending.items():
+            if future in done and future.exception() is None:
+                details[coin_id] = future.result()
+                continue
+            degraded.add(coin_id)
+            expired = entries.get(_coin_detail_key(coin_id))
+            details[coin_id] = expired[0] if expired is not None else None
+    if degraded:
+        record_cache_status("stale")
+    return details, degraded
+
+
+def _refresh_coin_details(coin_ids: List[str]) -> None:
+    for coin_id in coin_ids:
+        try:
+            _fetch_coin_detail(coin_id)
+        except HttpError:
+            continue
+
+
+def _fetch_coin_detail(coin_id: str) -> Dict[str, Any]:
+    detail_key = _coin_detail_key(coin_id)
+    return _load_once(detail_key, settings.cache_ttls["details"][0], lambda: _load_coin_detail(detail_key, coin_id))
+
+
+def _load_coin_detail(detail_key: str, coin_id: str) -> Dict[str, Any]:
+    detail = fetch_coin_details(coin_id)
+    tiered_cache.set(detail_key, detail)
+    return detail
+
+
+def get_coin_history(
+    coin_id: str,
+    timeframe_key: str,
+    vs_currency: str | None = None,
+    points: int | None = None,
+) -> List[Dict[str, Any]]:
+    vs_currency = (vs_currency or settings.default_vs_currency).lower()
+    start_ts, resolution = sync_coin_history(coin_id, timeframe_key, vs_currency)
+    if points is None:
+        return _history_rows(coin_id, vs_currency, start_ts, resolution)
+
+    hourly_start, newest_ts = get_price_coverage(coin_id, vs_currency, "hourly")
+    resolution = _lttb_resolution(resolution, start_ts, hourly_start)
+    cache_key = _lttb_cache_key(coin_id, vs_currency, timeframe_key, points, resolution, newest_ts)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+    return _store_lttb(cache_key, _history_rows(coin_id, vs_currency, start_ts, resolution), points)
+
+
+def _lttb_cache_key(
+    coin_id: str, vs_currency: str, timeframe_key: str, points: int, resolution: str, newest_ts: int | None
+) -> str:
+    # The source resolution and newest stored point identify the input the
+    # series was downsampled from, so a resolution switch or a new point
+    # simply misses instead of serving the old result.
+    return f"history-lttb:{coin_id}:{vs_currency}:{timeframe_key}:{points}:{resolution}:{newest_ts}"
+
+
+def _lttb_resolution(resolution: str, start_ts: int, hourly_start: int | None) -> str:
+    # Downsampling works best from dense input, so use hourly buckets whenever
+    # the stored series already has hourly coverage for the whole window.
+    return "hourly" if hourly_start is not None and hourly_start <= start_ts else resolution
+
+
+def _store_lttb(cache_key: str, rows: List[Dict[str, Any]], points: int) -> List[Dict[str, Any]]:
+    history = lttb(rows, points, x=lambda row: row["timestamp"], y=lambda row: row["price"])
+    cache.set(cache_key, history, settings.cache_ttls["history"][0])
+    return history
+
+
+def _history_state(coverage_start: int | None, last_ts: int | None, start_ts: int) -> Tuple[str, float]:
+    soft_ttl, hard_ttl = settings.cache_ttls["history"]
+    if coverage_start is None or last_ts is None or coverage_start > start_ts:
+        return "sync", float("inf")
+    age = time.time() - last_ts / 1000
+    if age <= soft_ttl:
+        return "fresh", age
+    if age <= hard_ttl:
+        return "stale", age
+    return "sync", age
+
+
+def sync_coin_history(coin_id: str, timeframe_key: str, vs_currency: str) -> Tuple[int, str]:
+    resolution, start_ts, fetch = _history_window(timeframe_key)
+    soft_ttl = settings.cache_ttls["history"][0]
+    sync_key = _price_sync_key(coin_id, vs_currency, fetch)
+
+    coverage_start, last_ts = get_price_coverage(coin_id, vs_currency, resolution)
+    state, age = _history_state(coverage_start, last_ts, start_ts)
+    if state == "fresh":
+        record_cache_status("fresh", soft_ttl - age)
+    elif state == "stale":
+        record_cache_status("stale")
+        _schedule_refresh(
+            [sync_key],
+            lambda _keys: _sync_price_history(sync_key, coin_id, vs_currency, fetch, start_ts),
+        )
+    else:
+        try:
+            _sync_price_history(sync_key, coin_id, vs_currency, fetch, start_ts)
+            record_cache_status("fresh", soft_ttl)
+        except HttpError:
+            if last_ts is None:
+                raise
+            record_cache_status("stale")
+
+    return start_ts, resolution
+
+
+def sync_coin_histories(
+    ids: List[str], timeframe_key: str, vs_currency: str
+) -> Tuple[int, str, Dict[str, BaseException | None]]:
+    # failures maps a coin to its error, or to None if it was still running at the deadline.
+    resolution, start_ts, fetch = _history_window(timeframe_key)
+    soft_ttl = settings.cache_ttls["history"][0]
+
+    coverage = get_price_coverages(ids, vs_currency, resolution)
+    stale: List[str] = []
+    pending: Dict[str, Future] = {}
+    oldest_age = 0.0
+    executor = _get_executor("history-sync", settings.detail_fetch_workers)
+    for coin_id in ids:
+        state, age = _history_state(*coverage[coin_id], start_ts)
+        if state != "sync":
+            oldest_age = max(oldest_age, age)
+            if state == "stale":
+                stale.append(coin_id)
+            continue
+        context = contextvars.copy_context()
+        sync_key = _price_sync_key(coin_id, vs_currency, fetch)
+        pending[coin_id] = executor.submit(
+            context.run, _sync_price_history, sync_key, coin_id, vs_currency, fetch, start_ts
+        )
+
+    if stale:
+        record_cache_status("stale")
+        coin_by_key = {_price_sync_key(coin_id, vs_currency, fetch): coin_id for coin_id in stale}
+        _schedule_refresh(
+            list(coin_by_key),
+            lambda claimed: _refresh_price_histories(
+                [(key, coin_by_key[key]) for key in claimed], vs_currency, fetch, start_ts
+            ),
+        )
+    elif len(pending) < len(ids):
+        record_cache_status("fresh", soft_ttl - oldest_age)
+
+    failures: Dict[str, BaseException | None] = {}
+    if pending:
+        done, _ = wait(pending.values(), timeout=settings.detail_fetch_deadline_seconds)
+        for coin_id, future in pending.items():
+            if future not in done:
+                failures[coin_id] = None
+                continue
+            error = future.exception()
+            if error is None:
+                continue
+            failures[coin_id] = error
+            if not isinstance(error, HttpError):
+                logger.error("Syncing %s price history for %s failed", timeframe_key, coin_id, exc_info=error)
+        if failures:
+            record_cache_status("stale")
+        else:
+            record_cache_status("fresh", soft_ttl)
+    return start_ts, resolution, failures
+
+
+def history_sync_error(failures: Dict[str, BaseException | None]) -> HttpError:
+    errors = [error for error in failures.values() if error is not None]
+    for error in errors:
+        if isinstance(error, HttpError):
+            return error
+    if errors:
+        return HttpError(502, "Failed to load price history")
+    return HttpError(504, "Timed out loading price history")
+
+
+def get_coins_history(
+    ids: List[str] | None,
+    timeframe_key: str,
+    vs_currency: str | None = None,
+    points: int | None = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    ids = list(dict.fromkeys(coin.strip().lower() for coin in ids or settings.default_coins if coin.strip()))
     vs_currency = (vs_currency or settings.default_vs_currency).lower()
+    if not ids:
+        raise HttpError(400, "At least one coin id is required")
+    if len(ids) > settings.max_coins_per_request:
+        raise HttpError(
+            400,
+            f"A maximum of {settings.max_coins_per_request} coins can be requested at once",
+        )
+    start_ts, resolution, failures = sync_coin_histories(ids, timeframe_key, vs_currency)
+
+    if points is None:
+        stored = get_price_points_many(ids, vs_currency, start_ts, resolution)
+        histories = {coin_id: _point_rows(stored.get(coin_id, [])) for coin_id in ids}
+    else:
+        histories = _downsampled_histories(ids, vs_currency, timeframe_key, points, start_ts, resolution)
+    if failures and len(failures) == len(ids) and not any(histories.values()):
+        raise history_sync_error(failures)
+    return histories
+
+
+def _downsampled_histories(
+    ids: List[str], vs_currency: str, timeframe_key: str, points: int, start_ts: int, resolution: str
+) -> Dict[str, List[Dict[str, Any]]]:
+    histories: Dict[str, List[Dict[str, Any]]] = {}
+    to_build: Dict[str, Dict[str, str]] = {}  # resolution -> {coin_id: cache_key}
+    hourly = get_price_coverages(ids, vs_currency, "hourly")
+    for coin_id in ids:
+        hourly_start, newest_ts = hourly[coin_id]
+        coin_resolution = _lttb_resolution(resolution, start_ts, hourly_start)
+        cache_key = _lttb_cache_key(coin_id, vs_currency, timeframe_key, points, coin_resolution, newest_ts)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            histories[coin_id] = cached
+        else:
+            to_build.setdefault(coin_resolution, {})[coin_id] = cache_key
+
+    for coin_resolution, keys in to_build.items():
+        stored = get_price_points_many(list(keys), vs_currency, start_ts, coin_resolution)
+        for coin_id, cache_key in keys.items():
+            histories[coin_id] = _store_lttb(cache_key, _point_rows(stored.get(coin_id, [])), points)
+    return {coin_id: histories[coin_id] for coin_id in ids}
+
+
+def _refresh_price_histories(
+    targets: List[Tuple[str, str]], vs_currency: str, fetch: RangeFetch, start_ts: int
+) -> None:
+    for sync_key, coin_id in targets:
+        try:
+            _sync_price_history(sync_key, coin_id, vs_currency, fetch, start_ts)
+        except HttpError:
+            continue
+
+
+def _history_window(timeframe_key: str) -> Tuple[str, int, RangeFetch]:
     if timeframe_key not in settings.supported_timeframes:
         raise HttpError(
             400,
             f"Invalid timeframe '{timeframe_key}'. Supported: {', '.join(settings.supported_timeframes.keys())}",
         )
-
     days = settings.supported_timeframes[timeframe_key]
-    cache_key = f"history:{coin_id}:{vs_currency}:{timeframe_key}"
-    cached = get_cached_json(cache_key, settings.api_cache_max_age_seconds)
-    if cached:
-        return cached
+    resolution = "hourly" if days <= 1 else "daily"
+    return resolution, int(time.time() * 1000) - days * DAY_MS, plan_for_days(days)
 
-    try:
-        data = fetch_market_chart(coin_id, vs_currency, days)
-    except HttpError as exc:
-        cached = get_cached_json(cache_key, settings.api_cache_max_age_seconds, allow_expired=True)
-        if cached is not None:
-            return cached
-        raise exc
 
+def _price_sync_key(coin_id: str, vs_currency: str, fetch: RangeFetch) -> str:
+    return f"price-sync:{coin_id}:{vs_currency}:{fetch.sync_key}"
+
+
+def history_columns(history: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    return {
+        "timestamp": [row["timestamp"] for row in history],
+        "price": [row["price"] for row in history],
+        "marketCap": [row["marketCap"] for row in history],
+        "volume": [row["volume"] for row in history],
+    }
+
+
+def _history_rows(coin_id: str, vs_currency: str, start_ts: int, resolution: str) -> List[Dict[str, Any]]:
+    return _point_rows(get_price_points(coin_id, vs_currency, start_ts, resolution))
+
+
+def _point_rows(points: List[PricePoint]) -> List[Dict[str, Any]]:
+    return [
+        {"timestamp": ts, "price": price, "marketCap": market_cap, "volume": volume}
+        for ts, price, market_cap, volume in points
+    ]
+
+
+def warm_coin_history(coin_id: str, vs_currency: str, timeframe_keys: List[str]) -> int:
+    now_ms = int(time.time() * 1000)
+    fetches = plan_history_fetches(timeframe_keys)
+    for fetch in fetches:
+        _sync_price_history(
+            _price_sync_key(coin_id, vs_currency, fetch),
+            coin_id,
+            vs_currency,
+            fetch,
+            now_ms - fetch.days * DAY_MS,
+        )
+    return len(fetches)
+
+
+def _sync_price_history(sync_key: str, coin_id: str, vs_currency: str, fetch: RangeFetch, start_ts: int) -> None:
+    # A missing range backfills the whole plan so every shorter timeframe shares the call.
+
+    def _run() -> None:
+        now = time.time()
+        coverage_start, last_ts = get_price_coverage(coin_id, vs_currency, fetch.resolution)
+        if last_ts is not None and now * 1000 - last_ts > HOURLY_RANGE_LIMIT_DAYS * DAY_MS:
+            # Upstream would answer a gap this long with daily points only.
+            reset_price_coverage(coin_id, vs_currency, "hourly")
+            if fetch.resolution == "hourly":
+                coverage_start = None
+
+        if coverage_start is None or coverage_start > start_ts or last_ts is None:
+            data = fetch_market_chart(coin_id, vs_currency, fetch.days, interval=fetch.interval)
+            store_price_points(
+                coin_id,
+                vs_currency,
+                _parse_chart(data),
+                fetch.resolution,
+                int(now * 1000) - fetch.days * DAY_MS,
+            )
+            return
+        if now - last_ts / 1000 <= settings.cache_ttls["history"][0]:
+            return  # another thread caught up while this one waited
+        points = _parse_chart(fetch_market_chart_range(coin_id, vs_currency, last_ts / 1000, now))
+        store_price_points(coin_id, vs_currency, points)
+
+    single_flight.do(sync_key, _run)
+
+
+def _parse_chart(data: Dict[str, Any]) -> List[PricePoint]:
     prices = data.get("prices") or []
     market_caps = data.get("market_caps") or []
     volumes = data.get("total_volumes") or []
 
-    history: List[Dict[str, Any]] = []
+    points: List[PricePoint] = []
     for idx, price_point in enumerate(prices):
         if not isinstance(price_point, list) or len(price_point) < 2:
             continue
@@ -219,41 +752,82 @@ def get_coin_history(coin_id: str, timeframe_key: str, vs_currency: str | None =
         market_cap = float(market_cap_point[1]) if market_cap_point and len(market_cap_point) > 1 else 0
         volume_point = volumes[idx] if idx < len(volumes) else None
         volume = float(volume_point[1]) if volume_point and len(volume_point) > 1 else 0
-        history.append(
-            {
-                "timestamp": timestamp,
-                "price": price,
-                "marketCap": market_cap,
-                "volume": volume,
-            }
-        )
-
-    set_cached_json(cache_key, history)
-    return history
+        points.append((timestamp, price, market_cap, volume))
+    return points
 
 
 def get_market_overview(vs_currency: str | None = None) -> Dict[str, Any]:
     vs_currency = (vs_currency or settings.default_vs_currency).lower()
-    cache_key = f"market-overview:{vs_currency}"
-    cached = get_cached_json(cache_key, settings.api_cache_max_age_seconds)
-    if cached:
-        return cached
+    executor = _get_executor("overview", len(_OVERVIEW_SOURCES))
+    futures = {
+        name: executor.submit(contextvars.copy_context().run, _read_overview_source, name, loader)
+        for name, loader in _OVERVIEW_SOURCES.items()
+    }
+
+    parts: Dict[str, Any] = {}
+    sources: Dict[str, Dict[str, Any]] = {}
+    errors: List[HttpError] = []
+    for name, future in futures.items():
+        try:
+            value, status, fetched_at = future.result()
+        except HttpError as exc:
+            errors.append(exc)
+            value, status, fetched_at = None, "unavailable", None
+        parts[name] = value
+        # A timestamp rather than an age, so the cached body and its ETag stay
+        # the same until the data changes; whole seconds absorb clock jitter.
+        sources[name] = {"status": status, "fetchedAt": int(round(fetched_at)) * 1000 if fetched_at else None}
+        if status == "fresh":
+            record_cache_status("fresh", settings.cache_ttls["overview"][0] - (time.time() - fetched_at))
+        else:
+            record_cache_status("stale")
+    if len(errors) == len(futures):
+        raise errors[0]
+
+    global_data = parts["global"] or {}
+    return {
+        "totalMarketCap": (global_data.get("total_market_cap") or {}).get(vs_currency, 0),
+        "totalVolume": (global_data.get("total_volume") or {}).get(vs_currency, 0),
+        "marketCapChange24h": global_data.get("market_cap_change_percentage_24h_usd", 0),
+        "dominance": global_data.get("market_cap_percentage", {}),
+        "trending": parts["trending"] or [],
+        "sources": sources,
+    }
 
-    try:
-        global_data, trending_data = fetch_global_data(), fetch_trending()
-    except HttpError as exc:
-        cached = get_cached_json(cache_key, settings.api_cache_max_age_seconds, allow_expired=True)
-        if cached is not None:
-            return cached
-        raise exc
 
-    total_market_cap = (global_data.get("data", {}).get("total_market_cap") or {}).get(vs_currency, 0)
-    total_volume = (global_data.get("data", {}).get("total_volume") or {}).get(vs_currency, 0)
-    market_cap_change = global_data.get("data", {}).get("market_cap_change_percentage_24h_usd", 0)
-    dominance = global_data.get("data", {}).get("market_cap_percentage", {})
+def _read_overview_source(name: str, loader: Callable[[], Any]) -> Tuple[Any, str, float]:
+    cache_key = f"overview-source:{name}"
+    value, status, age = _read_through(cache_key, "overview", lambda: _load_overview_source(cache_key, loader))
+    return value, status, time.time() - age
+
+
+def _load_overview_source(cache_key: str, loader: Callable[[], Any]) -> Any:
+    value = loader()
+    tiered_cache.set(cache_key, value)
+    return value
+
+
+def _load_global_summary() -> Dict[str, Any]:
+    return _global_summary(fetch_global_data())
+
+
+def _global_summary(payload: Dict[str, Any]) -> Dict[str, Any]:
+    data = payload.get("data", {})
+    return {
+        "total_market_cap": data.get("total_market_cap") or {},
+        "total_volume": data.get("total_volume") or {},
+        "market_cap_change_percentage_24h_usd": data.get("market_cap_change_percentage_24h_usd", 0),
+        "market_cap_percentage": data.get("market_cap_percentage", {}),
+    }
 
+
+def _load_trending_coins() -> List[Dict[str, Any]]:
+    return _trending_coins(fetch_trending())
+
+
+def _trending_coins(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
     trending_coins = []
-    for coin in trending_data.get("coins", []):
+    for coin in payload.get("coins", []):
         item = coin.get("item") or {}
         trending_coins.append(
             {
@@ -262,13 +836,83 @@ def get_market_overview(vs_currency: str | None = None) -> Dict[str, Any]:
                 "score": item.get("score"),
             }
         )
+    return trending_coins
 
-    result = {
-        "totalMarketCap": total_market_cap,
-        "totalVolume": total_volume,
-        "marketCapChange24h": market_cap_change,
-        "dominance": dominance,
-        "trending": trending_coins,
-    }
-    set_cached_json(cache_key, result)
-    return result
+
+# Independent upstream sources behind /api/market/overview.
+_OVERVIEW_SOURCES: Dict[str, Callable[[], Any]] = {
+    "global": _load_global_summary,
+    "trending": _load_trending_coins,
+}
+
+
+# The ASGI entry point (app/asgi.py) awaits these before handing a request to
+# Flask. They fetch on the event loop whatever the sync view would otherwise
+# have to fetch while holding a thread: keys that are missing or past their
+# hard TTL. Stale keys are left to the usual background refresh, and failures
+# to the view's own fallbacks.
+_ASYNC_OVERVIEW_SOURCES: Dict[str, Tuple[Callable[[], Any], Callable[[Any], Any]]] = {
+    "global": (fetch_global_data_async, _global_summary),
+    "trending": (fetch_trending_async, _trending_coins),
+}
+
+
+def _unusable_keys(cache_keys: List[str], endpoint: str) -> List[str]:
+    soft_ttl, hard_ttl = settings.cache_ttls[endpoint]
+    entries = tiered_cache.get_entries(cache_keys, soft_ttl)
+    return [key for key in cache_keys if key not in entries or entries[key][1] > hard_ttl]
+
+
+async def warm_coins(ids: List[str] | None, vs_currency: str | None, include_details: bool = True) -> None:
+    ids = list(dict.fromkeys(ids or settings.default_coins))
+    vs_currency = (vs_currency or settings.default_vs_currency).lower()
+    if not ids or len(ids) > settings.max_coins_per_request:
+        return  # the view reports the error
+
+    row_keys = {_market_row_key(coin_id, vs_currency): coin_id for coin_id in ids}
+    missing = await asyncio.to_thread(_unusable_keys, list(row_keys), "coins")
+    known = set(ids)
+    if missing:
+        try:
+            rows = await fetch_market_data_async([row_keys[key] for key in missing], vs_currency)
+            await asyncio.to_thread(
+                tiered_cache.set_many, {_market_row_key(row["id"], vs_currency): row for row in rows}
+            )
+            known = (known - {row_keys[key] for key in missing}) | {row["id"] for row in rows}
+        except HttpError:
+            return
+    if not include_details:
+        return
+
+    detail_keys = [_coin_detail_key(coin_id) for coin_id in ids if coin_id in known]
+    missing = await asyncio.to_thread(_unusable_keys, detail_keys, "details")
+    if missing:
+        fetches = [
+            asyncio.ensure_future(async_single_flight.do(key, lambda key=key: _warm_coin_detail(key)))
+            for key in missing
+        ]
+        # Past the deadline the view takes over, as it would for one of its own slow fetches.
+        await asyncio.wait(fetches, timeout=settings.detail_fetch_deadline_seconds)
+
+
+async def _warm_coin_detail(detail_key: str) -> None:
+    try:
+        detail = await fetch_coin_details_async(detail_key.split(":", 1)[1])
+    except HttpError:
+        return
+    await asyncio.to_thread(tiered_cache.set, detail_key, detail)
+
+
+async def warm_market_overview() -> None:
+    keys = {f"overview-source:{name}": source for name, source in _ASYNC_OVERVIEW_SOURCES.items()}
+    missing = await asyncio.to_thread(_unusable_keys, list(keys), "overview")
+    if missing:
+        await asyncio.gather(
+            *(async_single_flight.do(key, lambda key=key: _warm_overview_source(key, *keys[key])) for key in missing),
+            return_exceptions=True,
+        )
+
+
+async def _warm_overview_source(cache_key: str, fetch: Callable[[], Any], shape: Callable[[Any], Any]) -> None:
+    value = shape(await fetch())
+    await asyncio.to_thread(tiered_cache.set, cache_key, value)
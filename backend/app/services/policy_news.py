@@ -6,8 +6,8 @@ from typing import Dict, List
 
 import requests
 
-from app.config import settings
 from app.utils.cache import cache_wrap
+from app.utils.http import http_get
 
 NEWS_ENDPOINT = os.getenv("POLICY_NEWS_ENDPOINT", "https://min-api.cryptocompare.com/data/v2/news/")
 NEWS_CATEGORIES = os.getenv("POLICY_NEWS_CATEGORIES", "Regulation,General,Market,Energy,Forex")
@@ -237,12 +237,7 @@ def _fetch_policy_news() -> List[Dict[str, object]]:
         "limit": max(MAX_ITEMS * 2, 20),
         "extraParams": "crypto-health-intel",
     }
-    response = requests.get(
-        NEWS_ENDPOINT,
-        params=params,
-        timeout=settings.request_timeout_seconds,
-        headers={"User-Agent": "crypto-health-intel/1.0"},
-    )
+    response = http_get(NEWS_ENDPOINT, params=params)
     response.raise_for_status()
     payload = response.json()
     data = payload.get("Data", [])
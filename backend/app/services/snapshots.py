@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List, Set, Tuple
+
+from app.config import settings
+from app.db import get_health_ranking, get_health_trend, store_health_snapshots
+from app.utils.errors import HttpError
+
+DAY_MS = 86_400_000
+MAX_RANKING_LIMIT = 250
+MAX_TREND_DAYS = 365
+
+# (coin, vs_currency) -> snapshot slot already written by this process
+_written: Dict[Tuple[str, str], int] = {}
+_written_lock = threading.Lock()
+
+
+def _current_slot() -> int:
+    interval = max(settings.health_snapshot_interval_seconds, 1)
+    return int(time.time() // interval * interval) * 1000
+
+
+def record_health_snapshots(
+    coins: List[Dict[str, Any]],
+    scores: List[Dict[str, float]],
+    vs_currency: str,
+    skip: Set[str],
+) -> None:
+    """Persist a scoring run into the current snapshot slot.
+
+    Runs within one slot share its timestamp so that rankings compare coins
+    scored at (nearly) the same time. Coins in ``skip`` (scored from
+    degraded data) and coins this process already stored for the slot are
+    left out, so repeat requests cost no writes.
+    """
+    slot = _current_slot()
+    pending = []
+    with _written_lock:
+        for coin, metrics in zip(coins, scores):
+            key = (coin["id"], vs_currency)
+            if coin["id"] in skip or _written.get(key) == slot:
+                continue
+            _written[key] = slot
+            pending.append((coin["id"], metrics, coin.get("current_price")))
+    if pending:
+        store_health_snapshots(slot, vs_currency, pending)
+
+
+def get_health_rankings(vs_currency: str | None = None, limit: int = 20) -> Dict[str, Any]:
+    vs_currency = (vs_currency or settings.default_vs_currency).lower()
+    if not 1 <= limit <= MAX_RANKING_LIMIT:
+        raise HttpError(400, f"limit must be between 1 and {MAX_RANKING_LIMIT}")
+    # Coins scored in the latest or the previous slot count as current.
+    window_ms = max(settings.health_snapshot_interval_seconds, 1) * 1000
+    ts, coins = get_health_ranking(vs_currency, limit, window_ms)
+    return {"timestamp": ts, "vsCurrency": vs_currency, "coins": coins}
+
+
+def get_health_history(coin_id: str, vs_currency: str | None = None, days: int = 30) -> List[Dict[str, Any]]:
+    vs_currency = (vs_currency or settings.default_vs_currency).lower()
+    if not 1 <= days <= MAX_TREND_DAYS:
+        raise HttpError(400, f"days must be between 1 and {MAX_TREND_DAYS}")
+    return get_health_trend(coin_id.lower(), vs_currency, int(time.time() * 1000) - days * DAY_MS)
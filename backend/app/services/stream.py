@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Set, Tuple
+
+from app.config import settings
+from app.services.metrics import poll_coins_with_metrics
+from app.utils.codec import dumps
+from app.utils.errors import HttpError
+from app.utils.ratelimit import rate_limit_policy
+
+logger = logging.getLogger(__name__)
+
+# Events a subscriber may fall behind by before it is dropped; the client's
+# EventSource reconnects and starts again from a fresh snapshot.
+SUBSCRIBER_QUEUE_SIZE = 64
+# Sparklines are 168 points per coin and only move once an hour; deltas leave
+# them out and clients keep the ones from their last full load.
+OMITTED_FIELDS = ("sparkline_in_7d",)
+
+Event = Tuple[str, Dict[str, Any]]
+
+
+def format_event(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+def _stream_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    coin = {key: value for key, value in entry["coin"].items() if key not in OMITTED_FIELDS}
+    return {**entry, "coin": coin}
+
+
+class Subscription:
+    __slots__ = ("coins", "vs_currency", "queue", "closed", "notify")
+
+    def __init__(self, coins: List[str], vs_currency: str) -> None:
+        self.coins = coins
+        self.vs_currency = vs_currency
+        self.queue: "queue.Queue[Event]" = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.closed = False
+        # Called from the poller thread after each event or drop; lets the ASGI
+        # entry point wait on its event loop instead of blocking on the queue.
+        self.notify: Callable[[], None] | None = None
+
+    def events(self, heartbeat: float) -> Iterator[Event | None]:
+        """Yield queued events, or ``None`` after ``heartbeat`` idle seconds, until closed."""
+        while not self.closed:
+            try:
+                yield self.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield None
+
+
+class CoinStreamHub:
+    """Fan one market poller per process out to every open stream.
+
+    The poller asks for the union of all subscribed coins once per interval,
+    so upstream load follows the number of distinct coins rather than the
+    number of open connections, and only coins whose row or score changed
+    since the last poll are pushed.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._subscriptions: Set[Subscription] = set()
+        self._latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._started_pid: int | None = None
+        self._stats = {"polls": 0, "pollErrors": 0, "events": 0, "dropped": 0}
+
+    def subscribe(self, ids: List[str] | None, vs_currency: str | None) -> Tuple[Subscription, List[Dict[str, Any]]]:
+        """Register a stream and return it with a snapshot of the coins already known."""
+        coins = list(dict.fromkeys(coin.strip().lower() for coin in (ids or settings.default_coins) if coin.strip()))
+        vs_currency = (vs_currency or settings.default_vs_currency).lower()
+        if not coins:
+            raise HttpError(400, "At least one coin id is required")
+        if len(coins) > settings.max_coins_per_request:
+            raise HttpError(
+                400,
+                f"A maximum of {settings.max_coins_per_request} coins can be requested at once",
+            )
+
+        subscription = Subscription(coins, vs_currency)
+        with self._lock:
+            self._subscriptions.add(subscription)
+            snapshot = [self._latest[(vs_currency, coin)] for coin in coins if (vs_currency, coin) in self._latest]
+            self._ensure_poller()
+        if len(snapshot) < len(coins):
+            # Poll now rather than making the new stream wait a full interval.
+            self._wake.set()
+        return subscription, snapshot
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.closed = True
+        with self._lock:
+            self._subscriptions.discard(subscription)
+            wanted = {(sub.vs_currency, coin) for sub in self._subscriptions for coin in sub.coins}
+            for key in [key for key in self._latest if key not in wanted]:
+                del self._latest[key]
+
+    def poll_once(self) -> int:
+        """Refresh every subscribed coin once and publish what changed; return the number of changed coins."""
+        with self._lock:
+            wanted: Dict[str, Dict[str, None]] = {}
+            for subscription in self._subscriptions:
+                wanted.setdefault(subscription.vs_currency, {}).update(dict.fromkeys(subscription.coins))
+
+        changed_total = 0
+        for vs_currency, coins in wanted.items():
+            try:
+                # A background poll should skip a beat rather than queue for tokens.
+                with rate_limit_policy(wait=False):
+                    entries = poll_coins_with_metrics(list(coins), vs_currency, settings.stream_poll_interval_seconds)
+            except HttpError as exc:
+                self._stats["pollErrors"] += 1
+                logger.warning("Stream poll for %s failed: %s", vs_currency, exc)
+                continue
+            self._stats["polls"] += 1
+            changed_total += self._publish(vs_currency, [_stream_entry(entry) for entry in entries])
+        return changed_total
+
+    def _publish(self, vs_currency: str, entries: List[Dict[str, Any]]) -> int:
+        with self._lock:
+            changed: Dict[str, Dict[str, Any]] = {}
+            for entry in entries:
+                key = (vs_currency, entry["coin"]["id"])
+                if self._latest.get(key) != entry:
+                    self._latest[key] = entry
+                    changed[entry["coin"]["id"]] = entry
+            if not changed:
+                return 0
+            for subscription in list(self._subscriptions):
+                if subscription.vs_currency != vs_currency:
+                    continue
+                items = [changed[coin] for coin in subscription.coins if coin in changed]
+                if not items:
+                    continue
+                try:
+                    subscription.queue.put_nowait(("delta", {"vsCurrency": vs_currency, "coins": items}))
+                    self._stats["events"] += 1
+                except queue.Full:
+                    subscription.closed = True
+                    self._subscriptions.discard(subscription)
+                    self._stats["dropped"] += 1
+                if subscription.notify is not None:
+                    subscription.notify()
+            return len(changed)
+
+    def _ensure_poller(self) -> None:
+        # Called with the lock held; gunicorn workers each start their own poller.
+        if self._started_pid == os.getpid():
+            return
+        self._started_pid = os.getpid()
+        threading.Thread(target=self._run, name="coin-stream-poller", daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(settings.stream_poll_interval_seconds)
+            self._wake.clear()
+            if not self._subscriptions:
+                continue
+            try:
+                self.poll_once()
+            except Exception:  # pragma: no cover - keep the loop alive
+                self._stats["pollErrors"] += 1
+                logger.exception("Stream poll failed")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                **self._stats,
+                "subscribers": len(self._subscriptions),
+                "coins": len(self._latest),
+            }
+
+
+coin_stream = CoinStreamHub()
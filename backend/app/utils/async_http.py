@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from typing import Any
+
+from app.config import settings
+from app.utils.http import DEFAULT_HEADERS
+
+try:  # only needed when serving through app.asgi
+    import httpx
+except ImportError:  # pragma: no cover - depends on the environment
+    httpx = None
+
+_client: "httpx.AsyncClient | None" = None
+
+
+def get_async_client() -> "httpx.AsyncClient":
+    """Return the event loop's shared client; created on first use, closed by :func:`close_async_client`."""
+    global _client
+    if httpx is None:
+        raise RuntimeError("httpx is required for the ASGI entry point (pip install httpx)")
+    if _client is None:
+        _client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            timeout=settings.request_timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=settings.async_http_max_connections,
+                max_keepalive_connections=settings.http_pool_maxsize,
+            ),
+        )
+    return _client
+
+
+async def async_http_get(url: str, **kwargs: Any) -> "httpx.Response":
+    return await get_async_client().get(url, **kwargs)
+
+
+async def close_async_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -1,27 +1,258 @@
 from __future__ import annotations
 
-from cachetools import TTLCache
-from typing import Callable, TypeVar, Any
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Callable, Dict, List, NamedTuple, Tuple, TypeVar, Any
 
 from app.config import settings
+from app.db import get_cached_entries, set_cached_json_many
+from app.utils.singleflight import single_flight
+from app.utils.telemetry import CACHE_LOOKUPS, cache_prefix
 
 T = TypeVar("T")
 
-cache = TTLCache(maxsize=256, ttl=settings.cache_ttl_seconds)
 
+class _Entry(NamedTuple):
+    value: Any
+    expires_at: float
+    size: int
 
-def cache_get(key: str) -> Any:
-    return cache.get(key)
 
+def estimate_size(value: Any) -> int:
+    """Approximate footprint of a cached value: the length of its compact JSON form."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    try:
+        return len(json.dumps(value, separators=(",", ":"), default=str))
+    except (TypeError, ValueError):
+        return 1024
 
-def cache_set(key: str, value: Any, ttl: int | None = None) -> None:
-    # cachetools.TTLCache applies a global TTL; we ignore per-entry overrides for simplicity.
-    cache[key] = value
+
+class SizedTTLCache:
+    """Thread-safe LRU cache bounded by approximate byte size, with a TTL per entry."""
+
+    def __init__(self, max_bytes: int, default_ttl: float) -> None:
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._data: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "rejected": 0}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return default
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return default
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry.value
+
+    def set(self, key: str, value: Any, ttl: float | None = None, size: int | None = None) -> None:
+        size = estimate_size(value) if size is None else size
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if size > self.max_bytes:
+                # Would evict everything else and still not fit.
+                self._stats["rejected"] += 1
+                return
+            self._data[key] = _Entry(value, expires_at, size)
+            self._bytes += size
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry.expires_at > time.monotonic()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "maxBytes": self.max_bytes,
+            }
+
+    def _remove(self, key: str) -> None:
+        entry = self._data.pop(key)
+        self._bytes -= entry.size
+
+    def _evict(self) -> None:
+        # Expired entries go first, then least recently used ones.
+        now = time.monotonic()
+        for key in [key for key, entry in self._data.items() if entry.expires_at <= now]:
+            self._remove(key)
+            self._stats["expirations"] += 1
+        while self._bytes > self.max_bytes and self._data:
+            self._remove(next(iter(self._data)))
+            self._stats["evictions"] += 1
+
+
+class TieredCache:
+    """Two-tier cache: L1 is the in-process SizedTTLCache, L2 the SQLite ``api_cache`` table.
+
+    Reads return ``(value, age_seconds)`` so callers can apply their own
+    freshness rules. L1 is consulted first; when it has nothing young
+    enough, L2 is read and anything newer it holds is promoted into L1.
+    Writes go to both tiers. Hits and misses are counted per tier and per
+    key prefix (the part of the key before the first ``:``).
+    """
+
+    _RESULT_LABELS = {"l1Hits": "l1_hit", "l2Hits": "l2_hit", "misses": "miss"}
+
+    def __init__(self, l1: SizedTTLCache, l1_ttl: float) -> None:
+        self.l1 = l1
+        self.l1_ttl = l1_ttl
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def get_entry(self, key: str, max_age: float | None = None) -> Tuple[Any, float] | None:
+        return self.get_entries([key], max_age).get(key)
+
+    def get_entries(self, keys: List[str], max_age: float | None = None) -> Dict[str, Tuple[Any, float]]:
+        """Return the youngest known ``(value, age)`` per key, whatever its age.
+
+        ``max_age`` only decides whether an L1 entry is good enough to skip
+        L2, and what counts as a hit.
+        """
+        now = time.time()
+        results: Dict[str, Tuple[Any, float]] = {}
+        l2_keys: List[str] = []
+        for key in keys:
+            stored = self.l1.get(key)
+            if stored is not None:
+                value, fetched_at = stored
+                results[key] = (value, now - fetched_at)
+                if max_age is None or now - fetched_at <= max_age:
+                    self._count(key, "l1Hits")
+                    continue
+            l2_keys.append(key)
+
+        if l2_keys:
+            for key, (value, age) in get_cached_entries(l2_keys).items():
+                current = results.get(key)
+                if current is None or age < current[1]:
+                    results[key] = (value, age)
+                    self.l1.set(key, (value, now - age), self.l1_ttl)
+            for key in l2_keys:
+                entry = results.get(key)
+                hit = entry is not None and (max_age is None or entry[1] <= max_age)
+                self._count(key, "l2Hits" if hit else "misses")
+        return results
+
+    def set(self, key: str, value: Any, ttl: int | None = None) -> None:
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, entries: Dict[str, Any], ttl: int | None = None) -> None:
+        """Write through both tiers; ``ttl`` is how long L2 keeps the rows before purging."""
+        if not entries:
+            return
+        set_cached_json_many(entries, ttl)
+        now = time.time()
+        for key, value in entries.items():
+            self.l1.set(key, (value, now), self.l1_ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            prefixes = {prefix: dict(counts) for prefix, counts in self._stats.items()}
+        totals = {"l1Hits": 0, "l2Hits": 0, "misses": 0}
+        for counts in prefixes.values():
+            for name in totals:
+                totals[name] += counts[name]
+        lookups = sum(totals.values())
+        return {
+            **totals,
+            "l1HitRatio": totals["l1Hits"] / lookups if lookups else 0.0,
+            "l2HitRatio": totals["l2Hits"] / lookups if lookups else 0.0,
+            "prefixes": prefixes,
+            "l1": self.l1.stats(),
+        }
+
+    def _count(self, key: str, name: str) -> None:
+        prefix = cache_prefix(key)
+        CACHE_LOOKUPS.inc("tiered", prefix, self._RESULT_LABELS[name])
+        with self._lock:
+            counts = self._stats.get(prefix)
+            if counts is None:
+                counts = self._stats[prefix] = {"l1Hits": 0, "l2Hits": 0, "misses": 0}
+            counts[name] += 1
+
+
+cache = SizedTTLCache(max_bytes=settings.cache_max_bytes, default_ttl=settings.cache_ttl_seconds)
+tiered_cache = TieredCache(cache, l1_ttl=settings.api_cache_max_age_seconds)
+
+# How the data behind the current response was served: "fresh" or "stale".
+_cache_status: ContextVar[str | None] = ContextVar("cache_status", default=None)
+# Wall-clock time at which the freshest-expiring part of that data turns stale.
+_fresh_until: ContextVar[float | None] = ContextVar("fresh_until", default=None)
 
 
 def cache_wrap(key: str, factory: Callable[[], T], ttl: int | None = None) -> T:
-    if key in cache:
-        return cache[key]
-    value = factory()
-    cache_set(key, value, ttl)
+    """Return the cached value for ``key`` if younger than ``ttl``, else build and store it."""
+    max_age = settings.cache_ttl_seconds if ttl is None else ttl
+    entry = tiered_cache.get_entry(key, max_age)
+    if entry is not None and entry[1] <= max_age:
+        CACHE_LOOKUPS.inc("cache_wrap", cache_prefix(key), "hit")
+        record_cache_status("fresh", max_age - entry[1])
+        return entry[0]
+    CACHE_LOOKUPS.inc("cache_wrap", cache_prefix(key), "miss")
+
+    def _load() -> T:
+        # Re-check: a previous flight for this key may have just filled the cache.
+        entry = tiered_cache.get_entry(key, max_age)
+        if entry is not None and entry[1] <= max_age:
+            return entry[0]
+        value = factory()
+        tiered_cache.set(key, value)
+        return value
+
+    value = single_flight.do(key, _load)
+    record_cache_status("fresh", max_age)
     return value
+
+
+def record_cache_status(status: str, fresh_for: float | None = None) -> None:
+    """Note how part of the current response was served.
+
+    ``fresh_for`` is how many more seconds that part stays within its soft
+    TTL; the response as a whole is fresh only until the earliest of these.
+    """
+    # A response assembled from several cache entries is only as fresh as its stalest part.
+    if _cache_status.get() != "stale":
+        _cache_status.set(status)
+    if fresh_for is not None:
+        until = time.time() + fresh_for
+        current = _fresh_until.get()
+        if current is None or until < current:
+            _fresh_until.set(until)
+
+
+def peek_cache_status() -> Tuple[str | None, float | None]:
+    """Return ``(status, seconds_until_stale)`` recorded so far for the current response."""
+    until = _fresh_until.get()
+    return _cache_status.get(), None if until is None else until - time.time()
+
+
+def pop_cache_status() -> str | None:
+    status = _cache_status.get()
+    _cache_status.set(None)
+    _fresh_until.set(None)
+    return status
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import json
+import zlib
+from typing import Any, Tuple
+
+from app.config import settings
+
+try:  # optional, noticeably faster on large payloads
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# Row format tags stored next to each api_cache payload.
+FORMAT_JSON = "json"  # plain JSON text (every row written before formats existed)
+FORMAT_ZJSON = "zjson1"  # zlib-compressed UTF-8 JSON
+FORMATS = (FORMAT_JSON, FORMAT_ZJSON)
+
+
+class PayloadDecodeError(ValueError):
+    pass
+
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def encode_payload(value: Any) -> Tuple[bytes | str, str]:
+    """Serialize ``value`` for storage, compressing it when it is large enough to pay off."""
+    raw = dumps(value)
+    if len(raw) < settings.api_cache_compress_min_bytes:
+        return raw.decode("utf-8"), FORMAT_JSON
+    return zlib.compress(raw, settings.api_cache_compress_level), FORMAT_ZJSON
+
+
+def decode_payload(data: bytes | str, fmt: str | None) -> Any:
+    try:
+        if fmt == FORMAT_ZJSON:
+            return loads(zlib.decompress(data))
+        if fmt in (None, FORMAT_JSON):
+            return loads(data)
+    except (ValueError, zlib.error) as exc:
+        raise PayloadDecodeError(str(exc)) from exc
+    raise PayloadDecodeError(f"Unknown payload format '{fmt}'")
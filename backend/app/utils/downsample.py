@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Callable, List, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+def lttb(rows: Sequence[T], threshold: int, x: Callable[[T], float], y: Callable[[T], float]) -> List[T]:
+    """Largest-Triangle-Three-Buckets: keep ``threshold`` rows that preserve the visual shape.
+
+    The first and last rows are always kept. The rows in between are split
+    into ``threshold - 2`` buckets. From each bucket, the row kept is the
+    one that forms the largest triangle with the previously kept row and
+    the average of the next bucket.
+    """
+    count = len(rows)
+    if threshold >= count or threshold < 3:
+        return list(rows)
+
+    xs = [float(x(row)) for row in rows]
+    ys = [float(y(row)) for row in rows]
+    every = (count - 2) / (threshold - 2)
+    sampled = [rows[0]]
+    a = 0
+    for i in range(threshold - 2):
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, count)
+        span = avg_end - avg_start
+        avg_x = sum(xs[avg_start:avg_end]) / span
+        avg_y = sum(ys[avg_start:avg_end]) / span
+
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+        best_area = -1.0
+        best = range_start
+        for j in range(range_start, range_end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+        sampled.append(rows[best])
+        a = best
+    sampled.append(rows[-1])
+    return sampled
@@ -5,3 +5,9 @@ class HttpError(Exception):
     def __init__(self, status_code: int, message: str) -> None:
         super().__init__(message)
         self.status_code = status_code
+
+
+class RateLimitedError(HttpError):
+    def __init__(self, message: str, retry_after: float = 0.0) -> None:
+        super().__init__(429, message)
+        self.retry_after = retry_after
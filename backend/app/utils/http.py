@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from app.config import settings
+
+DEFAULT_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+    "User-Agent": "crypto-health-intel/1.0",
+}
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {"requests": 0, "connections_opened": 0}
+
+
+def _record(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _record("connections_opened")
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _record("connections_opened")
+        return super()._new_conn()
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools report how many TCP connections they open."""
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        _record("requests")
+        return super().send(request, **kwargs)
+
+
+_adapter_lock = threading.Lock()
+_adapter: PooledAdapter | None = None
+_local = threading.local()
+
+
+def _get_adapter() -> PooledAdapter:
+    global _adapter
+    if _adapter is None:
+        with _adapter_lock:
+            if _adapter is None:
+                _adapter = PooledAdapter(
+                    pool_connections=settings.http_pool_connections,
+                    pool_maxsize=settings.http_pool_maxsize,
+                    pool_block=settings.http_pool_block,
+                )
+    return _adapter
+
+
+def get_session() -> requests.Session:
+    """Return this thread's session; all sessions share one connection pool.
+
+    ``requests.Session`` keeps mutable per-session state (cookies, hooks), so
+    each thread gets its own session object while the underlying adapter,
+    which is thread-safe, is shared so keep-alive connections are reused
+    across threads.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        adapter = _get_adapter()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _local.session = session
+    return session
+
+
+def http_get(url: str, **kwargs: Any) -> requests.Response:
+    kwargs.setdefault("timeout", settings.request_timeout_seconds)
+    return get_session().get(url, **kwargs)
+
+
+def http_stats() -> Dict[str, int]:
+    with _stats_lock:
+        requests_sent = _stats["requests"]
+        opened = _stats["connections_opened"]
+    return {
+        "requests": requests_sent,
+        "connectionsOpened": opened,
+        "connectionsReused": max(requests_sent - opened, 0),
+    }
+
+
+def _reset_after_fork() -> None:
+    # Sockets must not be shared between a gunicorn master and its workers.
+    global _adapter, _adapter_lock, _local, _stats_lock
+    _adapter = None
+    _adapter_lock = threading.Lock()
+    _local = threading.local()
+    _stats_lock = threading.Lock()
+    for key in _stats:
+        _stats[key] = 0
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Callable
+
+from app.config import settings
+from app.db import (
+    purge_expired_cache,
+    purge_health_snapshots,
+    purge_price_points,
+    thin_price_points,
+    trim_price_coverage,
+)
+from app.services.history_plan import HOURLY_RANGE_LIMIT_DAYS, daily_fetch
+
+logger = logging.getLogger(__name__)
+
+DAY_MS = 86_400_000
+
+_lock = threading.Lock()
+_started_pid: int | None = None
+
+
+def _drain(purge: Callable[[int], int], batch_size: int) -> int:
+    total = 0
+    while True:
+        deleted = purge(batch_size)
+        total += deleted
+        if deleted < batch_size:
+            return total
+        # Let request threads get at the write lock between batches.
+        time.sleep(0)
+
+
+def purge_cache_once(batch_size: int | None = None) -> int:
+    """Delete every expired api_cache row in short batches and return the total."""
+    return _drain(purge_expired_cache, batch_size or settings.api_cache_purge_batch_size)
+
+
+def purge_snapshots_once(batch_size: int | None = None) -> int:
+    """Delete health snapshots older than the retention period and return the total."""
+    cutoff = int((time.time() - settings.health_snapshot_retention_days * 86400) * 1000)
+    return _drain(
+        lambda size: purge_health_snapshots(cutoff, size),
+        batch_size or settings.api_cache_purge_batch_size,
+    )
+
+
+def compact_price_points_once(batch_size: int | None = None) -> int:
+    """Thin and expire stored price history; return how many points were deleted.
+
+    Incremental syncs append 5-minute points, but reads take the last point
+    of each hourly or daily bucket. Past a day only the hourly ones are
+    kept, past the hourly window only the daily ones, and nothing older
+    than the longest timeframe.
+    """
+    batch_size = batch_size or settings.api_cache_purge_batch_size
+    now_ms = int(time.time() * 1000)
+    hourly_cutoff = now_ms - HOURLY_RANGE_LIMIT_DAYS * DAY_MS
+    # One spare day so the longest window never starts before the oldest point.
+    horizon = now_ms - (daily_fetch().days + 1) * DAY_MS
+    removed = _drain(lambda size: thin_price_points(now_ms - DAY_MS, "hourly", size), batch_size)
+    removed += _drain(lambda size: thin_price_points(hourly_cutoff, "daily", size), batch_size)
+    trim_price_coverage("hourly", hourly_cutoff)
+    removed += _drain(lambda size: purge_price_points(horizon, size), batch_size)
+    trim_price_coverage("daily", horizon)
+    return removed
+
+
+_PURGES = (
+    ("expired api_cache", purge_cache_once),
+    ("old health_snapshots", purge_snapshots_once),
+    ("redundant price_points", compact_price_points_once),
+)
+
+
+def _run(interval: float) -> None:
+    while True:
+        for name, purge in _PURGES:
+            try:
+                removed = purge()
+                if removed:
+                    logger.info("Purged %s %s rows", removed, name)
+            except Exception:  # pragma: no cover - keep the loop alive
+                logger.exception("Purging %s rows failed", name)
+        time.sleep(interval)
+
+
+def start_cache_purger() -> None:
+    """Start the background purge thread once per process (gunicorn workers each get one)."""
+    global _started_pid
+    interval = settings.api_cache_purge_interval_seconds
+    if interval <= 0:
+        return
+    with _lock:
+        if _started_pid == os.getpid():
+            return
+        _started_pid = os.getpid()
+    threading.Thread(target=_run, args=(interval,), name="api-cache-purge", daemon=True).start()
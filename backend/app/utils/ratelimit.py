@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator
+
+from app.config import settings
+from app.db import block_rate_limit, consume_rate_limit_token
+from app.utils.errors import RateLimitedError
+
+# (wait for a token?, longest acceptable wait in seconds)
+_policy: ContextVar[tuple[bool, float] | None] = ContextVar("rate_limit_policy", default=None)
+
+
+@contextmanager
+def rate_limit_policy(wait: bool, max_wait: float | None = None) -> Iterator[None]:
+    """Choose how upstream calls made inside the block react to an empty bucket.
+
+    ``wait=True`` sleeps until a token is free (at most ``max_wait`` seconds);
+    ``wait=False`` raises :class:`RateLimitedError` immediately so the caller
+    can fall back to stale data.
+    """
+    token = _policy.set((wait, settings.rate_limit_max_wait_seconds if max_wait is None else max_wait))
+    try:
+        yield
+    finally:
+        _policy.reset(token)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class TokenBucket:
+    """Token bucket shared by every process that uses the same SQLite file."""
+
+    def __init__(self, name: str, rate_per_minute: float, burst: int) -> None:
+        self.name = name
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = float(max(burst, 1))
+        self._lock = threading.Lock()
+        self._stats: Dict[str, float] = {"acquired": 0, "rejected": 0, "waitedSeconds": 0.0, "blocked": 0}
+
+    def _count(self, key: str, amount: float = 1) -> None:
+        with self._lock:
+            self._stats[key] += amount
+
+    def _policy(self, wait: bool | None, max_wait: float | None) -> tuple[bool, float]:
+        policy_wait, policy_max_wait = _policy.get() or (
+            settings.rate_limit_wait,
+            settings.rate_limit_max_wait_seconds,
+        )
+        wait = policy_wait if wait is None else wait
+        max_wait = policy_max_wait if max_wait is None else max_wait
+        return wait, time.monotonic() + max_wait
+
+    def _check_delay(self, delay: float, wait: bool, deadline: float) -> bool:
+        """Return True once a token was taken; raise if waiting ``delay`` is not allowed."""
+        if delay <= 0:
+            self._count("acquired")
+            return True
+        if not wait or time.monotonic() + delay > deadline:
+            self._count("rejected")
+            raise RateLimitedError(
+                f"Upstream rate limit reached for {self.name}, retry in {delay:.1f}s",
+                retry_after=delay,
+            )
+        self._count("waitedSeconds", delay)
+        return False
+
+    def acquire(self, wait: bool | None = None, max_wait: float | None = None) -> None:
+        wait, deadline = self._policy(wait, max_wait)
+        while True:
+            delay = consume_rate_limit_token(self.name, self.rate_per_second, self.capacity)
+            if self._check_delay(delay, wait, deadline):
+                return
+            time.sleep(delay)
+
+    async def acquire_async(self, wait: bool | None = None, max_wait: float | None = None) -> None:
+        """:meth:`acquire` for the event loop: the SQLite update runs in a thread, waits use ``asyncio.sleep``."""
+        wait, deadline = self._policy(wait, max_wait)
+        while True:
+            delay = await asyncio.to_thread(consume_rate_limit_token, self.name, self.rate_per_second, self.capacity)
+            if self._check_delay(delay, wait, deadline):
+                return
+            await asyncio.sleep(delay)
+
+    def block_for(self, seconds: float) -> None:
+        """Pause the bucket for all processes, e.g. after an upstream 429."""
+        self._count("blocked")
+        block_rate_limit(self.name, time.time() + seconds)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Tuple
+
+from flask import Response, request
+
+try:  # optional, smaller than gzip for repetitive JSON
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+from app.config import settings
+from app.utils.cache import SizedTTLCache, peek_cache_status, record_cache_status
+from app.utils.codec import dumps
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    length: int
+    digest: str  # doubles as the strong ETag: it changes exactly when the body does
+    modified: float  # epoch seconds when the body was encoded
+    fresh_until: float  # epoch seconds after which the data behind it is stale
+    variants: Dict[str, bytes]  # pre-compressed bodies by content coding
+
+
+def _supported_encodings() -> Tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.response_brotli_quality)
+    # mtime=0 keeps the output, and so the ETag, identical for identical bodies.
+    return gzip.compress(body, compresslevel=settings.response_gzip_level, mtime=0)
+
+
+class ResponseCache:
+    """Encoded JSON response bodies, keyed by request path and query string.
+
+    Only bodies built entirely from fresh data are kept, and only until the
+    first part of that data reaches its soft TTL, so a hit never serves
+    anything the read-through path would not have served as fresh.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self._bodies = SizedTTLCache(max_bytes=max_bytes, default_ttl=0)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stored": 0}
+
+    def get(self, key: str) -> CachedBody | None:
+        cached = self._bodies.get(key)
+        self._count("hits" if cached is not None else "misses")
+        return cached
+
+    def __contains__(self, key: str) -> bool:
+        """Whether a fresh body is held for ``key``; unlike :meth:`get`, not counted as a lookup."""
+        return key in self._bodies
+
+    def put(self, key: str, body: bytes, ttl: float) -> CachedBody:
+        """Wrap ``body``; when it will be cached, compress it once per supported coding up front."""
+        now = time.time()
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        variants: Dict[str, bytes] = {}
+        if ttl > 0 and len(body) >= settings.response_compress_min_bytes:
+            variants = {encoding: compress(body, encoding) for encoding in _supported_encodings()}
+        cached = CachedBody(body, len(body), digest, now, now + max(ttl, 0), variants)
+        if ttl > 0:
+            size = cached.length + sum(len(variant) for variant in variants.values())
+            self._bodies.set(key, cached, ttl, size=size)
+            self._count("stored")
+        return cached
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "bodies": self._bodies.stats()}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+
+response_cache = ResponseCache(max_bytes=settings.response_cache_max_bytes)
+
+
+def request_key(path: str, args: Iterable[Tuple[str, str]]) -> str:
+    """Cache key for a request to ``path`` with query ``args``, independent of their order."""
+    return path + "?" + "&".join(f"{name}={value}" for name, value in sorted(args))
+
+
+def _request_key() -> str:
+    return request_key(request.path, request.args.items(multi=True))
+
+
+def _negotiate_encoding(cached: CachedBody) -> str | None:
+    if cached.length < settings.response_compress_min_bytes:
+        return None
+    return request.accept_encodings.best_match(_supported_encodings())
+
+
+def _json_response(cached: CachedBody, ttls: Tuple[int, int] | None, client_swr: int) -> Response:
+    """Wrap the bytes with validators; answers 304 straight away if the client's copy matches."""
+    body, etag = cached.body, cached.digest
+    encoding = _negotiate_encoding(cached)
+    if encoding is not None:
+        body = cached.variants.get(encoding) or compress(cached.body, encoding)
+        # A strong ETag must differ between representations.
+        etag = f"{cached.digest}-{encoding}"
+
+    response = Response(body, mimetype="application/json")
+    response.content_length = len(body)
+    response.set_etag(etag)
+    response.vary.add("Accept-Encoding")
+    if encoding is not None:
+        response.content_encoding = encoding
+    response.last_modified = cached.modified
+    if ttls is not None:
+        soft_ttl, hard_ttl = ttls
+        response.cache_control.public = True
+        response.cache_control.max_age = max(int(cached.fresh_until - time.time()), 0)
+        stale_for = min(hard_ttl - soft_ttl, client_swr)
+        if stale_for > 0:
+            response.cache_control.stale_while_revalidate = stale_for
+    return response.make_conditional(request)
+
+
+def cached_json_response(
+    build: Callable[[], Any], ttls: Tuple[int, int] | None = None, client_swr: int = 0
+) -> Response:
+    """Serve the current request from pre-encoded bytes, building and encoding it on a miss.
+
+    ``ttls`` is the endpoint's ``(soft, hard)`` cache TTL pair. It sets
+    ``Cache-Control``: ``max-age`` runs until the data turns stale and
+    ``stale-while-revalidate`` is ``client_swr``, capped at the rest of the
+    hard TTL; the hard TTL itself is only the server's fallback. Every
+    response carries a strong ``ETag`` and ``Last-Modified``. A matching
+    ``If-None-Match`` on a cache hit gets a 304 without touching the body.
+    """
+    key = _request_key()
+    cached = response_cache.get(key)
+    if cached is not None:
+        record_cache_status("fresh")
+        return _json_response(cached, ttls, client_swr)
+
+    data = build()
+    status, fresh_for = peek_cache_status()
+    ttl = fresh_for if status == "fresh" and fresh_for is not None else 0
+    return _json_response(response_cache.put(key, dumps(data), ttl), ttls, client_swr)
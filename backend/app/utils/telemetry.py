@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Seconds; spans a cached response (sub-millisecond) to a slow upstream call.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+EMAIL_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic count per label combination; ``inc`` takes the label values positionally."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_label_text(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram:
+    """Latency distribution per label combination, in Prometheus' cumulative-bucket layout."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # labels -> [count per bucket..., count above the last bucket, sum]
+        self._series: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def _snapshot(self) -> List[Tuple[Labels, List[float]]]:
+        with self._lock:
+            return [(labels, list(values)) for labels, values in self._series.items()]
+
+    def samples(self) -> Iterator[str]:
+        for labels, values in self._snapshot():
+            cumulative = 0
+            for upper, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                le = f'le="{_number(upper)}"'
+                yield f"{self.name}_bucket{_label_text(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_label_text(self.labelnames, labels)} {_number(values[-1])}"
+            yield f"{self.name}_count{_label_text(self.labelnames, labels)} {cumulative}"
+
+
+class SharedHistogram(Histogram):
+    """Histogram stored in the shared SQLite database instead of process memory.
+
+    For values recorded by short-lived processes such as the cron email
+    digest, which exit before anything could scrape them; the web process
+    reads the totals back when rendering ``/metrics``.
+    """
+
+    def observe(self, value: float, *labels: str) -> None:
+        from app.db import add_shared_histogram_observation  # app.db imports this module
+
+        add_shared_histogram_observation(self.name, labels, bisect_left(self.buckets, value), value)
+
+    def _snapshot(self) -> List[Tuple[Labels, List[float]]]:
+        from app.db import get_shared_histogram
+
+        return list(get_shared_histogram(self.name, len(self.buckets) + 1).items())
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[Counter | Histogram] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        shared: bool = False,
+    ) -> Histogram:
+        metric = (SharedHistogram if shared else Histogram)(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+def cache_prefix(key: str) -> str:
+    """The part of a cache key before the first ``:``, which names what is cached."""
+    return key.split(":", 1)[0]
+
+
+# Each process keeps its own registry; with several gunicorn workers every
+# scrape sees the worker that answered it.
+registry = Registry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests handled, by route, method and status.", ("route", "method", "status")
+)
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "Time until the response is ready to send, by route.", ("route", "method")
+)
+UPSTREAM_REQUESTS = registry.counter(
+    "upstream_requests_total",
+    "Upstream API attempts, by endpoint and HTTP status (\"error\" for network failures).",
+    ("upstream", "endpoint", "status"),
+)
+UPSTREAM_REQUEST_DURATION = registry.histogram(
+    "upstream_request_duration_seconds", "Upstream API attempt latency, by endpoint.", ("upstream", "endpoint")
+)
+CACHE_LOOKUPS = registry.counter(
+    "cache_lookups_total", "Cache lookups, by cache, key prefix and result.", ("cache", "prefix", "result")
+)
+SQLITE_QUERY_DURATION = registry.histogram(
+    "sqlite_query_duration_seconds", "Time spent in each app.db query function.", ("query",), QUERY_BUCKETS
+)
+# The digest usually runs from cron in its own process, so this one lives in SQLite.
+EMAIL_SEND_DURATION = registry.histogram(
+    "email_send_duration_seconds", "SMTP send latency, by outcome.", ("status",), EMAIL_BUCKETS, shared=True
+)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+BASE_DIR = Path(__file__).resolve().parent
+
+
+class StubCoinGecko(BaseHTTPRequestHandler):
+    """Answers /coins/markets and /coins/<id> after a fixed delay, like a slow upstream."""
+
+    latency = 0.5
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path.endswith("/coins/markets"):
+            body = [self._market_row(coin_id) for coin_id in query["ids"].split(",")]
+        else:
+            body = {
+                "id": url.path.rsplit("/", 1)[-1],
+                "market_data": {"price_change_percentage_7d": 2.5, "price_change_percentage_30d": -4.0},
+                "developer_data": {"stars": 120, "forks": 40, "commit_count_4_weeks": 25, "pull_requests_merged": 9},
+                "community_data": {"twitter_followers": 150000, "reddit_subscribers": 40000},
+            }
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    @staticmethod
+    def _market_row(coin_id: str) -> Dict:
+        rng = random.Random(coin_id)
+        price = rng.uniform(1, 1000)
+        return {
+            "id": coin_id,
+            "symbol": coin_id[:4],
+            "name": coin_id,
+            "current_price": price,
+            "high_24h": price * 1.04,
+            "low_24h": price * 0.96,
+            "price_change_percentage_24h": rng.uniform(-5, 5),
+            "total_volume": rng.uniform(1e6, 1e9),
+            "market_cap": rng.uniform(1e8, 1e11),
+            "sparkline_in_7d": {"price": [price] * 168},
+        }
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(latency: float) -> ThreadingHTTPServer:
+    StubCoinGecko.latency = latency
+    ThreadingHTTPServer.request_queue_size = 1024
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubCoinGecko)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def server_command(mode: str, port: int, threads: int) -> List[str]:
+    if mode == "sync":
+        return [
+            sys.executable, "-m", "gunicorn", "--worker-class", "gthread", "--workers", "1",
+            "--threads", str(threads), "--bind", f"127.0.0.1:{port}", "--log-level", "warning", "app:create_app()",
+        ]
+    return [sys.executable, "-m", "uvicorn", "app.asgi:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+
+
+def wait_until_ready(base_url: str, process: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/healthz", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start in time")
+
+
+async def fire(base_url: str, requests: int, concurrency: int, run: str) -> Tuple[List[float], int, float]:
+    """Request ``requests`` distinct coins, ``concurrency`` at a time; each one misses the cache."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+
+        async def one(index: int) -> None:
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.get("/api/coins", params={"ids": f"{run}-coin-{index}"})
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(index) for index in range(requests)))
+        return latencies, errors, time.perf_counter() - started
+
+
+def run_mode(mode: str, args, upstream_url: str, port: int) -> None:
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = {
+            **os.environ,
+            "COINGECKO_BASE_URL": upstream_url,
+            "COINGECKO_RATE_LIMIT_PER_MINUTE": "1000000",
+            "COINGECKO_RATE_LIMIT_BURST": "100000",
+            "DATABASE_PATH": os.path.join(data_dir, "bench.sqlite3"),
+            "HTTP_POOL_MAXSIZE": str(args.upstream_connections),
+            "ASYNC_HTTP_MAX_CONNECTIONS": str(args.upstream_connections),
+            "ASGI_WSGI_THREADS": str(args.threads),
+            "API_CACHE_PURGE_INTERVAL_SECONDS": "0",
+        }
+        process = subprocess.Popen(server_command(mode, port, args.threads), cwd=BASE_DIR, env=env)
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            wait_until_ready(base_url, process)
+            latencies, errors, elapsed = asyncio.run(fire(base_url, args.requests, args.concurrency, mode))
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"[bench] {mode:5} threads={args.threads} requests={args.requests} concurrency={args.concurrency}: "
+        f"{args.requests / elapsed:,.1f} req/s, p50={statistics.median(latencies) * 1000:.0f} ms, "
+        f"p95={p95 * 1000:.0f} ms, max={latencies[-1] * 1000:.0f} ms, errors={errors}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare gunicorn (threads) and uvicorn (app.asgi) on cache misses")
+    parser.add_argument("--requests", type=int, default=400, help="Requests per mode, each for an uncached coin (default: 400)")
+    parser.add_argument("--concurrency", type=int, default=200, help="Requests in flight at once (default: 200)")
+    parser.add_argument("--threads", type=int, default=16, help="gthread threads / ASGI_WSGI_THREADS (default: 16)")
+    parser.add_argument("--upstream-latency", type=float, default=0.5, help="Stub upstream delay in seconds (default: 0.5)")
+    parser.add_argument("--upstream-connections", type=int, default=64, help="Upstream connection cap for both modes (default: 64)")
+    parser.add_argument("--modes", type=str, default="sync,async", help="Comma-separated modes to run (default: sync,async)")
+    parser.add_argument("--port", type=int, default=14100, help="Port for the server under test (default: 14100)")
+    args = parser.parse_args()
+
+    stub = start_stub(args.upstream_latency)
+    upstream_url = f"http://127.0.0.1:{stub.server_port}"
+    print(f"[bench] stub upstream at {upstream_url}, {args.upstream_latency:.2f}s per call")
+    for mode in [value.strip() for value in args.modes.split(",") if value.strip()]:
+        run_mode(mode, args, upstream_url, args.port)
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
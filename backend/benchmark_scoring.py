@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BASE_DIR))
+
+from app.services.metrics import compute_metrics  # noqa: E402
+from app.services.scoring import compute_metrics_batch  # noqa: E402
+
+DEFAULT_SIZES = [10, 250, 5000]
+
+
+def synthetic_market(count: int, seed: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any] | None]]:
+    """Market rows and details shaped like CoinGecko's, including the gaps real data has."""
+    rng = random.Random(seed)
+    coins: List[Dict[str, Any]] = []
+    details: List[Dict[str, Any] | None] = []
+    for index in range(count):
+        price = rng.uniform(0.0001, 60000)
+        coin: Dict[str, Any] = {
+            "id": f"coin-{index}",
+            "current_price": price if rng.random() > 0.02 else None,
+            "high_24h": price * rng.uniform(1.0, 1.3) if rng.random() > 0.05 else None,
+            "low_24h": price * rng.uniform(0.7, 1.0) if rng.random() > 0.05 else 0,
+            "price_change_percentage_24h": rng.uniform(-30, 30) if rng.random() > 0.03 else None,
+            "total_volume": rng.uniform(0, 5e10),
+            "market_cap": rng.uniform(0, 1e12) if rng.random() > 0.03 else 0,
+        }
+        if rng.random() > 0.1:
+            base = price * rng.uniform(0.5, 1.5) if rng.random() > 0.02 else 0
+            coin["sparkline_in_7d"] = {"price": [base] + [price] * 167}
+        coins.append(coin)
+
+        if rng.random() < 0.15:
+            details.append(None)
+            continue
+        detail: Dict[str, Any] = {
+            "market_data": {
+                "price_change_percentage_7d": rng.uniform(-50, 50) if rng.random() > 0.1 else None,
+                "price_change_percentage_30d": rng.uniform(-80, 80) if rng.random() > 0.2 else None,
+            }
+        }
+        if rng.random() > 0.2:
+            detail["developer_data"] = {
+                "stars": rng.randint(0, 80000),
+                "forks": rng.randint(0, 30000),
+                "commit_count_4_weeks": rng.randint(0, 900) if rng.random() > 0.1 else None,
+                "pull_requests_merged": rng.randint(0, 20000),
+            }
+        if rng.random() > 0.2:
+            detail["community_data"] = {
+                "twitter_followers": rng.randint(0, 7_000_000),
+                "reddit_subscribers": rng.randint(0, 5_000_000) if rng.random() > 0.1 else None,
+            }
+        details.append(detail)
+    return coins, details
+
+
+def check_parity(coins: List[Dict[str, Any]], details: List[Dict[str, Any] | None]) -> int:
+    """Compare both engines coin by coin; return the number of mismatching values."""
+    mismatches = 0
+    for coin, detail, batch in zip(coins, details, compute_metrics_batch(coins, details)):
+        scalar = compute_metrics(coin, detail)
+        for key, expected in scalar.items():
+            if not math.isclose(batch[key], expected, rel_tol=1e-9, abs_tol=1e-9):
+                mismatches += 1
+                print(f"[bench] mismatch {coin['id']} {key}: scalar={expected} batch={batch[key]}")
+    return mismatches
+
+
+def best_of(repeats: int, func) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the scalar and batch health-score engines")
+    parser.add_argument("--sizes", type=str, default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated coin counts")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per size; the fastest is reported (default: 5)")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for the synthetic market (default: 7)")
+    args = parser.parse_args()
+
+    failed = False
+    for size in [int(value) for value in args.sizes.split(",") if value.strip()]:
+        coins, details = synthetic_market(size, args.seed)
+        mismatches = check_parity(coins, details)
+        failed |= mismatches > 0
+
+        scalar = best_of(args.repeats, lambda: [compute_metrics(c, d) for c, d in zip(coins, details)])
+        batch = best_of(args.repeats, lambda: compute_metrics_batch(coins, details))
+        print(
+            f"[bench] coins={size}: scalar={scalar * 1000:.2f} ms ({size / scalar:,.0f} coins/s), "
+            f"batch={batch * 1000:.2f} ms ({size / batch:,.0f} coins/s), "
+            f"speedup={scalar / batch:.1f}x, parity={'ok' if not mismatches else f'{mismatches} mismatches'}"
+        )
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
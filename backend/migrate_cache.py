@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, List, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BASE_DIR))
+
+from app.db import (  # noqa: E402
+    database_size_bytes,
+    init_db,
+    iter_cached_payloads,
+    rewrite_cached_payloads,
+    vacuum,
+)
+from app.utils.codec import FORMAT_JSON, PayloadDecodeError, decode_payload, encode_payload  # noqa: E402
+
+
+def measure() -> Tuple[int, int, float]:
+    """Return (rows, payload bytes, seconds spent decoding every payload)."""
+    rows = 0
+    payload_bytes = 0
+    decode_seconds = 0.0
+    for _key, data, fmt in iter_cached_payloads():
+        rows += 1
+        payload_bytes += len(data)
+        started = time.perf_counter()
+        try:
+            decode_payload(data, fmt)
+        except PayloadDecodeError:
+            pass
+        decode_seconds += time.perf_counter() - started
+    return rows, payload_bytes, decode_seconds
+
+
+def report(label: str) -> None:
+    rows, payload_bytes, decode_seconds = measure()
+    per_row_ms = decode_seconds / rows * 1000 if rows else 0.0
+    print(
+        f"[migrate] {label}: db={database_size_bytes() / 1024:.1f} KiB, rows={rows}, "
+        f"payloads={payload_bytes / 1024:.1f} KiB, decode={decode_seconds * 1000:.1f} ms "
+        f"({per_row_ms:.3f} ms/row)"
+    )
+
+
+def migrate(batch_size: int) -> int:
+    pending: List[Tuple[str, Any, str]] = []
+    converted = 0
+    for key, data, fmt in iter_cached_payloads(batch_size):
+        if fmt != FORMAT_JSON:
+            continue
+        try:
+            value = decode_payload(data, fmt)
+        except PayloadDecodeError:
+            continue
+        new_data, new_fmt = encode_payload(value)
+        if new_fmt == fmt:
+            continue
+        pending.append((key, new_data, new_fmt))
+        if len(pending) >= batch_size:
+            rewrite_cached_payloads(pending)
+            converted += len(pending)
+            pending = []
+    if pending:
+        rewrite_cached_payloads(pending)
+        converted += len(pending)
+    return converted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-encode legacy JSON rows in api_cache with the compact format")
+    parser.add_argument("--batch-size", type=int, default=200, help="Rows rewritten per transaction (default: 200)")
+    parser.add_argument("--no-vacuum", action="store_true", help="Skip VACUUM after rewriting (file size will not shrink)")
+    args = parser.parse_args()
+
+    init_db()
+    report("before")
+    converted = migrate(args.batch_size)
+    print(f"[migrate] re-encoded {converted} rows")
+    if not args.no_vacuum:
+        vacuum()
+    report("after")
+
+
+if __name__ == "__main__":
+    main()
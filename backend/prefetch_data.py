@@ -17,30 +17,34 @@ BASE_DIR = Path(__file__).resolve().parent
 sys.path.insert(0, str(BASE_DIR))
 
 from app.config import settings  # noqa: E402
+from app.db import init_db  # noqa: E402
 from app.services.metrics import (  # noqa: E402
-    get_coin_history,
     get_coins_with_metrics,
     get_market_overview,
+    warm_coin_history,
 )
-from app.utils.errors import HttpError  # noqa: E402
+from app.utils.errors import HttpError, RateLimitedError  # noqa: E402
+from app.utils.ratelimit import rate_limit_policy  # noqa: E402
 
 load_dotenv(BASE_DIR / ".env")
 
 DEFAULT_TIMEFRAMES = ["1D", "7D", "30D"]
+# The cron job is not latency sensitive: queue behind API workers for tokens.
+PREFETCH_MAX_WAIT_SECONDS = 300
 
 
 def safe_call(func, *args, **kwargs):
     retries = 3
     for attempt in range(1, retries + 1):
         try:
-            return func(*args, **kwargs)
-        except HttpError as exc:
+            with rate_limit_policy(wait=True, max_wait=PREFETCH_MAX_WAIT_SECONDS):
+                return func(*args, **kwargs)
+        except RateLimitedError:
+            raise
+        except HttpError:
             if attempt == retries:
                 raise
-            if "429" in str(exc):
-                time.sleep(2 * attempt)
-            else:
-                time.sleep(1)
+            time.sleep(1)
 
 
 def prefetch(coins: List[str], vs_currency: str, timeframes: Iterable[str], sleep_interval: float) -> None:
@@ -49,10 +53,10 @@ def prefetch(coins: List[str], vs_currency: str, timeframes: Iterable[str], slee
     time.sleep(sleep_interval)
 
     for coin in coins:
-        for tf in timeframes:
-            print(f"[prefetch] history {coin} {tf}")
-            safe_call(get_coin_history, coin, tf, vs_currency)
-            time.sleep(sleep_interval)
+        # The planner turns all timeframes into at most one hourly and one daily upstream fetch.
+        print(f"[prefetch] history {coin} {','.join(timeframes)}")
+        safe_call(warm_coin_history, coin, vs_currency, timeframes)
+        time.sleep(sleep_interval)
 
     print("[prefetch] market overview")
     safe_call(get_market_overview, vs_currency)
@@ -64,7 +68,12 @@ def main():
     parser.add_argument("--coins", type=str, default=",".join(settings.default_coins), help="Comma-separated coin ids")
     parser.add_argument("--vs", type=str, default=settings.default_vs_currency, help="Quote currency (default: usd)")
     parser.add_argument("--timeframes", type=str, default=",".join(DEFAULT_TIMEFRAMES), help="Comma-separated timeframes to prefetch")
-    parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to sleep between API calls (default: 2s)")
+    parser.add_argument(
+        "--sleep",
+        type=float,
+        default=0.0,
+        help="Extra seconds to sleep between API calls; pacing is handled by the shared rate limiter (default: 0)",
+    )
     args = parser.parse_args()
 
     coins = [coin.strip().lower() for coin in args.coins.split(",") if coin.strip()]
@@ -73,7 +82,12 @@ def main():
     if not coins:
         print("No coins specified.")
         return
+    unknown = [tf for tf in timeframes if tf not in settings.supported_timeframes]
+    if unknown:
+        print(f"Unsupported timeframes: {', '.join(unknown)}")
+        return
 
+    init_db()
     prefetch(coins, args.vs.lower(), timeframes, args.sleep)
     print("Prefetch completed. Data stored in local cache.")
 
@@ -4,6 +4,7 @@ from __future__ import annotations
 import os
 import smtplib
 import sys
+import time
 from email.message import EmailMessage
 from pathlib import Path
 from typing import List
@@ -14,10 +15,11 @@ BASE_DIR = Path(__file__).resolve().parent
 sys.path.insert(0, str(BASE_DIR))
 
 from app.config import settings  # noqa: E402
-from app.db import get_config, list_users  # noqa: E402
-from app.services.metrics import get_coins_with_metrics, get_coin_history  # noqa: E402
+from app.db import get_config, init_db, list_users  # noqa: E402
+from app.services.metrics import get_coins_with_metrics, get_coins_history  # noqa: E402
 from app.services.policy_news import get_policy_news  # noqa: E402
 from app.utils.errors import HttpError  # noqa: E402
+from app.utils.telemetry import EMAIL_SEND_DURATION  # noqa: E402
 
 load_dotenv(BASE_DIR / ".env")
 
@@ -50,11 +52,15 @@ def build_email_body(email: str, coins: List[str]) -> str:
         lines.append(f"- 数据获取失败: {exc}")
         return "\n".join(lines)
 
+    try:
+        histories = get_coins_history([item["coin"]["id"] for item in metrics], "7D")
+    except HttpError:
+        histories = {}
+
     for item in metrics:
         coin = item["coin"]
         meta = item["metrics"]
-        history = get_coin_history(coin["id"], "7D")
-        forecast = forecast_change_percentage(history)
+        forecast = forecast_change_percentage(histories.get(coin["id"], []))
         change24h = coin.get("price_change_percentage_24h", 0) or 0
         direction = "上涨" if change24h >= 0 else "下跌"
         lines.extend(
@@ -213,14 +219,17 @@ def send_email(config: dict[str, object], recipient: str, subject: str, body: st
     msg["To"] = recipient
     msg.set_content(body)
 
+    started = time.perf_counter()
     try:
         with smtplib.SMTP(smtp_host, smtp_port) as server:
             server.starttls()
             if smtp_username and smtp_password:
                 server.login(str(smtp_username), str(smtp_password))
             server.send_message(msg)
+        EMAIL_SEND_DURATION.observe(time.perf_counter() - started, "sent")
         return True, "已发送"
     except Exception as exc:  # pragma: no cover
+        EMAIL_SEND_DURATION.observe(time.perf_counter() - started, "failed")
         return False, str(exc)
 
 
@@ -272,4 +281,5 @@ def run_once(verbose: bool = True) -> dict[str, object]:
 
 
 if __name__ == "__main__":
+    init_db()
     run_once(verbose=True)
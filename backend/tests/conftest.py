@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Settings and the database path are read at import time, so point them at a
+# scratch database before anything imports ``app``.
+os.environ.setdefault("DATABASE_PATH", os.path.join(tempfile.mkdtemp(prefix="chi-tests-"), "test.sqlite3"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.db import init_db  # noqa: E402
+
+init_db()
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from app.db import _get_connection, get_cached_entries, set_cached_json_many
+from app.utils.telemetry import CACHE_LOOKUPS
+
+
+def _sqlite_lookups(prefix: str, result: str) -> float:
+    return CACHE_LOOKUPS._values.get(("sqlite", prefix, result), 0)
+
+
+def test_undecodable_rows_count_as_misses():
+    set_cached_json_many({"corrupt:a": {"ok": True}, "corrupt:b": {"ok": True}})
+    conn = _get_connection()
+    with conn:
+        conn.execute("UPDATE api_cache SET data = ? WHERE cache_key = ?", (b"\x00not json", "corrupt:b"))
+    hits, misses = _sqlite_lookups("corrupt", "hit"), _sqlite_lookups("corrupt", "miss")
+
+    entries = get_cached_entries(["corrupt:a", "corrupt:b"])
+
+    assert list(entries) == ["corrupt:a"]
+    assert _sqlite_lookups("corrupt", "hit") == hits + 1
+    assert _sqlite_lookups("corrupt", "miss") == misses + 1
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from app.db import get_price_coverage, store_price_points
+from app.services import metrics
+from app.services.metrics import DAY_MS, get_coin_history, get_coins_history
+from app.utils.cache import cache
+from app.utils.errors import HttpError
+
+
+def _store_hourly_series(coin: str, vs_currency: str, days: int) -> None:
+    now_ms = int(time.time() * 1000)
+    start_ts = now_ms - days * DAY_MS
+    points = [(ts, 100.0 + (ts // 3_600_000) % 7, 1e9, 1e7) for ts in range(start_ts, now_ms, 3_600_000)]
+    store_price_points(coin, vs_currency, points, "hourly", start_ts - DAY_MS)
+    store_price_points(coin, vs_currency, points, "daily", start_ts - DAY_MS)
+
+
+def test_downsampled_histories_share_the_per_coin_cache():
+    _store_hourly_series("bitcoin", "chf", 8)
+    _store_hourly_series("ethereum", "chf", 8)
+
+    histories = get_coins_history(["bitcoin", "ethereum"], "7D", vs_currency="chf", points=20)
+
+    assert all(len(rows) == 20 for rows in histories.values())
+    newest_ts = get_price_coverage("bitcoin", "chf", "hourly")[1]
+    assert cache.get(metrics._lttb_cache_key("bitcoin", "chf", "7D", 20, "hourly", newest_ts)) == histories["bitcoin"]
+    assert get_coin_history("bitcoin", "7D", vs_currency="chf", points=20) == histories["bitcoin"]
+
+
+def test_downsampled_history_follows_a_resolution_switch():
+    now_ms = int(time.time() * 1000)
+    start_ts = now_ms - 8 * DAY_MS
+    hourly = [(ts, 100.0 + (ts // 3_600_000) % 5, 1e9, 1e7) for ts in range(start_ts, now_ms, 3_600_000)]
+    # Daily coverage only at first; the newest point stays the same throughout.
+    store_price_points("solana", "chf", hourly[::24] + hourly[-1:], "daily", start_ts - DAY_MS)
+    daily_based = get_coin_history("solana", "7D", vs_currency="chf", points=40)
+
+    store_price_points("solana", "chf", hourly, "hourly", start_ts - DAY_MS)
+    hourly_based = get_coin_history("solana", "7D", vs_currency="chf", points=40)
+
+    assert len(daily_based) < 40
+    assert len(hourly_based) == 40
+
+
+def test_failed_sync_reports_the_underlying_error(monkeypatch):
+    def _broken(*_args):
+        raise ValueError("unexpected payload")
+
+    monkeypatch.setattr(metrics, "_sync_price_history", _broken)
+    with pytest.raises(HttpError) as raised:
+        get_coins_history(["nothing-stored"], "7D", vs_currency="chf")
+
+    assert raised.value.status_code == 502
+
+
+def test_history_sync_error_tells_timeouts_from_failures():
+    upstream = HttpError(429, "CoinGecko API error (429): Too Many Requests")
+
+    assert metrics.history_sync_error({"a": None, "b": upstream}) is upstream
+    assert metrics.history_sync_error({"a": None, "b": RuntimeError()}).status_code == 502
+    assert metrics.history_sync_error({"a": None}).status_code == 504
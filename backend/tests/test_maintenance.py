@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import time
+
+from app.db import _get_connection, get_price_coverage, get_price_points, store_price_points
+from app.services.history_plan import HOURLY_RANGE_LIMIT_DAYS, daily_fetch
+from app.utils.maintenance import DAY_MS, compact_price_points_once
+
+FIVE_MINUTES_MS = 300_000
+
+
+def test_compaction_keeps_what_reads_use():
+    now_ms = int(time.time() * 1000)
+    start_ts = now_ms - (daily_fetch().days + 5) * DAY_MS
+    points = [(ts, float(ts % 997), 1e9, 1e7) for ts in range(start_ts, now_ms, FIVE_MINUTES_MS)]
+    store_price_points("compact", "sek", points, "hourly", start_ts)
+    store_price_points("compact", "sek", [], "daily", start_ts)
+    hourly_start = now_ms - 3 * DAY_MS
+    daily_start = now_ms - daily_fetch().days * DAY_MS
+    hourly_before = get_price_points("compact", "sek", hourly_start, "hourly")
+    daily_before = get_price_points("compact", "sek", daily_start, "daily")
+
+    removed = compact_price_points_once(batch_size=5000)
+
+    assert removed > len(points) * 0.9
+    assert get_price_points("compact", "sek", hourly_start, "hourly") == hourly_before
+    assert get_price_points("compact", "sek", daily_start, "daily") == daily_before
+    # The last day keeps its 5-minute points for incremental syncs to build on.
+    recent_since = now_ms - DAY_MS + FIVE_MINUTES_MS
+    recent = _get_connection().execute(
+        "SELECT COUNT(*) FROM price_points WHERE coin = 'compact' AND vs_currency = 'sek' AND ts >= ?",
+        (recent_since,),
+    ).fetchone()[0]
+    assert recent == sum(1 for ts, *_ in points if ts >= recent_since)
+    assert get_price_coverage("compact", "sek", "hourly")[0] >= now_ms - HOURLY_RANGE_LIMIT_DAYS * DAY_MS
+    assert get_price_coverage("compact", "sek", "daily")[0] <= daily_start
+    assert compact_price_points_once(batch_size=5000) == 0
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import math
+
+import pytest
+
+from app.config import settings
+from app.services import metrics
+from app.services.metrics import compute_metrics, score_coins
+from app.services.scoring import BATCH_MIN_COINS, compute_metrics_batch
+from app.utils.errors import HttpError
+
+FULL_DETAIL = {
+    "market_data": {"price_change_percentage_7d": 4.2, "price_change_percentage_30d": -12.5},
+    "developer_data": {"stars": 900, "forks": 300, "commit_count_4_weeks": 120, "pull_requests_merged": 80},
+    "community_data": {"twitter_followers": 400_000, "reddit_subscribers": 90_000},
+}
+
+
+def _coin(coin_id: str, **fields) -> dict:
+    row = {
+        "id": coin_id,
+        "current_price": 100.0,
+        "high_24h": 108.0,
+        "low_24h": 95.0,
+        "price_change_percentage_24h": 3.1,
+        "total_volume": 2e8,
+        "market_cap": 5e9,
+        "sparkline_in_7d": {"price": [92.0] + [100.0] * 167},
+    }
+    row.update(fields)
+    return row
+
+
+EDGE_CASES = {
+    "full": (_coin("full"), FULL_DETAIL),
+    "no details": (_coin("no-details"), None),
+    "empty details": (_coin("empty-details"), {}),
+    "details without sections": (_coin("sparse"), {"developer_data": {}, "community_data": {}}),
+    "null detail values": (
+        _coin("null-values", sparkline_in_7d=None),
+        {
+            "market_data": {"price_change_percentage_7d": None, "price_change_percentage_30d": None},
+            "developer_data": {"stars": None, "forks": 3, "commit_count_4_weeks": None, "pull_requests_merged": None},
+            "community_data": {"twitter_followers": None, "reddit_subscribers": 10},
+        },
+    ),
+    "zero volume": (_coin("zero-volume", total_volume=0), FULL_DETAIL),
+    "none volume and market cap": (_coin("none-volume", total_volume=None, market_cap=None), FULL_DETAIL),
+    "zero market cap": (_coin("zero-cap", market_cap=0), None),
+    "no price range": (_coin("no-range", high_24h=None, low_24h=0), FULL_DETAIL),
+    "no price": (_coin("no-price", current_price=None, price_change_percentage_24h=None), None),
+    "zero sparkline base": (_coin("zero-base", sparkline_in_7d={"price": [0] + [100.0] * 167}), FULL_DETAIL),
+    "empty sparkline": (_coin("empty-spark", sparkline_in_7d={"price": []}), FULL_DETAIL),
+    "bare row": ({"id": "bare"}, None),
+}
+
+
+def _assert_same(batch: dict, scalar: dict) -> None:
+    assert batch.keys() == scalar.keys()
+    for key, expected in scalar.items():
+        assert math.isclose(batch[key], expected, rel_tol=1e-9, abs_tol=1e-9), key
+
+
+@pytest.mark.parametrize("case", EDGE_CASES.values(), ids=EDGE_CASES.keys())
+def test_single_coin_matches_scalar(case):
+    coin, detail = case
+
+    (batch,) = compute_metrics_batch([coin], [detail])
+
+    _assert_same(batch, compute_metrics(coin, detail))
+
+
+def test_mixed_batch_matches_scalar():
+    coins = [coin for coin, _ in EDGE_CASES.values()]
+    details = [detail for _, detail in EDGE_CASES.values()]
+
+    for coin, detail, batch in zip(coins, details, compute_metrics_batch(coins, details)):
+        _assert_same(batch, compute_metrics(coin, detail))
+
+
+def test_empty_input():
+    assert compute_metrics_batch([], []) == []
+    assert score_coins([], []) == []
+
+
+@pytest.mark.parametrize("count", [1, BATCH_MIN_COINS - 1, BATCH_MIN_COINS, BATCH_MIN_COINS * 3])
+def test_score_coins_agrees_on_both_sides_of_the_threshold(count):
+    cases = list(EDGE_CASES.values())
+    coins = [dict(cases[i % len(cases)][0], id=f"coin-{i}") for i in range(count)]
+    details = [cases[i % len(cases)][1] for i in range(count)]
+
+    scores = score_coins(coins, details)
+
+    assert len(scores) == count
+    for coin, detail, score in zip(coins, details, scores):
+        _assert_same(score, compute_metrics(coin, detail))
+
+
+def test_top_coins_are_scored_past_the_per_request_cap(monkeypatch):
+    rows = [_coin(f"top-{i}", market_cap=1e12 - i, total_volume=1e8 * (i % 7)) for i in range(100)]
+    calls = []
+    monkeypatch.setattr(metrics, "fetch_top_market_data", lambda vs, limit: calls.append(limit) or rows[:limit])
+
+    top = metrics.get_top_coins_with_metrics("nok", limit=100)
+
+    assert 100 > settings.max_coins_per_request and 100 >= BATCH_MIN_COINS
+    assert [entry["coin"]["id"] for entry in top] == [row["id"] for row in rows]
+    for row, entry in zip(rows, top):
+        _assert_same(entry["metrics"], compute_metrics(row, None))
+    metrics.get_top_coins_with_metrics("nok", limit=100)
+    assert calls == [100]
+    for limit in (0, 251):
+        with pytest.raises(HttpError):
+            metrics.get_top_coins_with_metrics("nok", limit=limit)
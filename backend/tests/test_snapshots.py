@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from app.config import settings
+from app.db import get_health_ranking, store_health_snapshots
+from app.services.snapshots import get_health_rankings
+
+
+def _metrics(health: float) -> dict:
+    return {
+        "healthScore": health,
+        "volatilityScore": 50.0,
+        "liquidityScore": 50.0,
+        "momentumScore": 50.0,
+        "developmentScore": 50.0,
+    }
+
+
+def test_ranking_merges_runs_with_different_coin_sets():
+    interval_ms = settings.health_snapshot_interval_seconds * 1000
+    earlier = 1_700_000_000_000
+    later = earlier + interval_ms
+    store_health_snapshots(earlier, "eur", [("bitcoin", _metrics(80), 1.0), ("ethereum", _metrics(70), 2.0)])
+    # The next slot's only run scored a different set of coins.
+    store_health_snapshots(later, "eur", [("solana", _metrics(90), 3.0), ("ethereum", _metrics(60), 2.5)])
+
+    ts, coins = get_health_ranking("eur", 10, interval_ms)
+
+    assert ts == later
+    assert [coin["coin"] for coin in coins] == ["solana", "bitcoin", "ethereum"]
+    ethereum = next(coin for coin in coins if coin["coin"] == "ethereum")
+    assert ethereum["timestamp"] == later
+    assert ethereum["healthScore"] == 60
+
+
+def test_ranking_drops_coins_outside_the_window():
+    interval_ms = settings.health_snapshot_interval_seconds * 1000
+    old = 1_600_000_000_000
+    store_health_snapshots(old, "gbp", [("dogecoin", _metrics(99), 0.1)])
+    store_health_snapshots(old + 3 * interval_ms, "gbp", [("bitcoin", _metrics(50), 1.0)])
+
+    ranking = get_health_rankings("gbp", limit=10)
+
+    assert [coin["coin"] for coin in ranking["coins"]] == ["bitcoin"]
@@ -1,22 +1,81 @@
-import { useQuery } from "@tanstack/react-query";
+import { useEffect, useState } from "react";
+import { useQuery, useQueryClient } from "@tanstack/react-query";
 import {
+  coinStreamUrl,
   fetchCoinHistory,
   fetchCoins,
+  fetchCoinsHistory,
   fetchMarketOverview,
   fetchPolicyNews,
   fetchNfpSeries,
 } from "../lib/api";
-import type { TimeframeKey } from "../types/crypto";
+import type { CoinMetrics, CoinStreamEvent, TimeframeKey } from "../types/crypto";
 
-export function useCoinsQuery(ids?: string[], vsCurrency?: string, includeDetails = true) {
+export function useCoinsQuery(
+  ids?: string[],
+  vsCurrency?: string,
+  includeDetails = true,
+  live = false
+) {
   return useQuery({
     queryKey: ["coins", ids?.join(","), vsCurrency, includeDetails],
     queryFn: () => fetchCoins({ ids, vsCurrency, includeDetails }),
     staleTime: 30_000,
-    refetchInterval: 60_000,
+    // While the stream is connected it keeps prices current; poll rarely to pick up details.
+    refetchInterval: live ? 10 * 60_000 : 60_000,
   });
 }
 
+function mergeStreamedCoins(current: CoinMetrics[] | undefined, updates: CoinMetrics[]) {
+  if (!current) {
+    return current;
+  }
+  const byId = new Map(updates.map((item) => [item.coin.id, item]));
+  return current.map((item) => {
+    const update = byId.get(item.coin.id);
+    if (!update) {
+      return item;
+    }
+    // Stream scores skip uncached details; keep the fuller score from the last full load.
+    const keepMetrics = update.degraded && !item.degraded;
+    return {
+      ...item,
+      coin: { ...item.coin, ...update.coin },
+      metrics: keepMetrics ? item.metrics : update.metrics,
+    };
+  });
+}
+
+/** Apply server-sent price updates to the matching coins query; returns whether the stream is open. */
+export function useCoinStream(ids: string[], vsCurrency?: string) {
+  const queryClient = useQueryClient();
+  const [connected, setConnected] = useState(false);
+  const idsKey = ids.join(",");
+
+  useEffect(() => {
+    if (!idsKey || typeof EventSource === "undefined") {
+      return undefined;
+    }
+    const source = new EventSource(coinStreamUrl(idsKey.split(","), vsCurrency));
+    const apply = (event: MessageEvent<string>) => {
+      const payload = JSON.parse(event.data) as CoinStreamEvent;
+      queryClient.setQueryData<CoinMetrics[]>(["coins", idsKey, vsCurrency, true], (current) =>
+        mergeStreamedCoins(current, payload.coins)
+      );
+    };
+    source.addEventListener("snapshot", apply as EventListener);
+    source.addEventListener("delta", apply as EventListener);
+    source.onopen = () => setConnected(true);
+    source.onerror = () => setConnected(false);
+    return () => {
+      source.close();
+      setConnected(false);
+    };
+  }, [idsKey, vsCurrency, queryClient]);
+
+  return connected;
+}
+
 export function useMarketOverviewQuery(vsCurrency?: string) {
   return useQuery({
     queryKey: ["market-overview", vsCurrency],
@@ -56,3 +115,17 @@ export function useCoinHistoryQuery(
     refetchInterval: 120_000,
   });
 }
+
+export function useCoinsHistoryQuery(
+  ids: string[],
+  timeframe: TimeframeKey,
+  vsCurrency?: string
+) {
+  return useQuery({
+    queryKey: ["coins-history", ids.join(","), timeframe, vsCurrency],
+    queryFn: () => fetchCoinsHistory({ ids, timeframe, vsCurrency }),
+    enabled: ids.length > 0,
+    staleTime: 30_000,
+    refetchInterval: 120_000,
+  });
+}
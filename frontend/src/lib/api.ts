@@ -8,11 +8,21 @@ import type {
 import type { PolicyNewsItem } from "../types/news";
 import type { NfpResponse } from "../types/macro";
 
+const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || "http://localhost:4000";
+
 const api = axios.create({
-  baseURL: import.meta.env.VITE_API_BASE_URL || "http://localhost:4000",
+  baseURL: API_BASE_URL,
   timeout: 10_000,
 });
 
+export function coinStreamUrl(ids: string[], vsCurrency?: string): string {
+  const params = new URLSearchParams({ ids: ids.join(",") });
+  if (vsCurrency) {
+    params.set("vs_currency", vsCurrency);
+  }
+  return `${API_BASE_URL}/api/stream/coins?${params.toString()}`;
+}
+
 export async function fetchCoins({
   ids,
   vsCurrency,
@@ -67,3 +77,25 @@ export async function fetchCoinHistory({
   );
   return response.data;
 }
+
+export async function fetchCoinsHistory({
+  ids,
+  timeframe,
+  vsCurrency,
+}: {
+  ids: string[];
+  timeframe: TimeframeKey;
+  vsCurrency?: string;
+}): Promise<Record<string, HistoricalPoint[]>> {
+  const response = await api.get<Record<string, HistoricalPoint[]>>(
+    "/api/coins/history",
+    {
+      params: {
+        ids: ids.join(","),
+        timeframe,
+        ...(vsCurrency ? { vs_currency: vsCurrency } : {}),
+      },
+    }
+  );
+  return response.data;
+}
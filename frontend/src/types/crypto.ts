@@ -35,6 +35,12 @@ export interface CalculatedMetrics {
 export interface CoinMetrics {
   coin: MarketCoin;
   metrics: CalculatedMetrics;
+  degraded?: boolean;
+}
+
+export interface CoinStreamEvent {
+  vsCurrency: string;
+  coins: CoinMetrics[];
 }
 
 export interface HistoricalPoint {
@@ -54,6 +60,13 @@ export interface MarketOverview {
     symbol: string;
     score: number;
   }>;
+  sources?: Record<
+    string,
+    {
+      status: "fresh" | "stale" | "unavailable";
+      fetchedAt: number | null;
+    }
+  >;
 }
 
 export type TimeframeKey = "1D" | "7D" | "30D" | "90D" | "1Y";
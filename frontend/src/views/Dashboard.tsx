@@ -13,7 +13,8 @@ import { StatCards } from "../components/StatCards";
 import { TimeframeSelector } from "../components/TimeframeSelector";
 import { TrendingList } from "../components/TrendingList";
 import {
-  useCoinHistoryQuery,
+  useCoinStream,
+  useCoinsHistoryQuery,
   useCoinsQuery,
   useMarketOverviewQuery,
 } from "../hooks/useCryptoData";
@@ -26,13 +27,11 @@ export function Dashboard() {
   const [trackedCoins, setTrackedCoins] = useState<string[]>(DEFAULT_TRACKED_COINS);
   const maxTrackedCoins = 12;
 
-  const coinsQuery = useCoinsQuery(trackedCoins, vsCurrency);
+  const streaming = useCoinStream(trackedCoins, vsCurrency);
+  const coinsQuery = useCoinsQuery(trackedCoins, vsCurrency, true, streaming);
   const overviewQuery = useMarketOverviewQuery(vsCurrency);
-  const historyQuery = useCoinHistoryQuery(
-    selectedCoinId ?? "",
-    timeframe,
-    vsCurrency
-  );
+  // One request for every tracked coin, so switching the selected coin needs no refetch.
+  const historiesQuery = useCoinsHistoryQuery(trackedCoins, timeframe, vsCurrency);
 
   const coins: CoinMetrics[] = coinsQuery.data ?? [];
   const selectedCoin = coins.find((item) => item.coin.id === selectedCoinId);
@@ -103,7 +102,7 @@ export function Dashboard() {
         style={{ gridTemplateColumns: "minmax(0, 2fr) minmax(0, 1fr)", gap: "1.5rem" }}
       >
         <HistoryChart
-          data={historyQuery.data}
+          data={selectedCoinId ? historiesQuery.data?.[selectedCoinId] : undefined}
           timeframe={timeframe}
           vsCurrency={vsCurrency}
           headerActions={<TimeframeSelector value={timeframe} onChange={setTimeframe} />}